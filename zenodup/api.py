@@ -4,18 +4,30 @@ Module for interaction with Zenodo API using instances of the Connection class.
 Please see README.md for more detailed documentation.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import csv
 import json
 import logging
 from lxml import etree
 import os
 import requests
+from requests.adapters import HTTPAdapter
+import threading
+import time
+from urllib3.util.retry import Retry
 from xml.etree import ElementTree as ET
 import yaml
-import time
 
 import bundles
+from bundles import records
 from bundles import sanity
+from bundles import tei
+from bundles import titles
+from cache import ResponseCache
+from journal import ChecksumCache, UploadJournal
+import metrics
 
 # set base paths for working directories
 with open(r'config.yml') as file:
@@ -26,6 +38,208 @@ XMLParser = etree.XMLParser()
 ET.register_namespace('', "http://www.tei-c.org/ns/1.0")
 namespace = {'TEI': "http://www.tei-c.org/ns/1.0"}  
 
+
+class RateLimiter:
+    """Token bucket limiting the rate of requests to Zenodo API
+
+    The limiter is shared by all requests of a session (and all threads using it). 
+    The rate is bounded by the configured rate limit and adapted to Zenodo's 
+    X-RateLimit-Remaining and X-RateLimit-Reset headers: the remaining requests are 
+    spread over the time until the rate limit window resets. If Zenodo rejects a 
+    request with status 429, all requests are paused (see backoff).
+    """
+
+    def __init__(self, limit: int = 100, period: float = 60, burst: int = 1):
+        """Constructor of RateLimiter class
+
+        Parameters
+        ----------
+        limit : int
+            Maximum number of requests per period
+        period : float
+            Period in seconds
+        burst : int
+            Maximum number of requests sent at once (capacity of token bucket)
+        """
+
+        self.max_rate = limit / period
+        self.rate = self.max_rate
+        self.capacity = burst
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__paused_until = 0.0
+        self.__lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until a request may be sent"""
+
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__refill(now)
+                if now >= self.__paused_until and self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                wait = max(self.__paused_until - now, (1 - self.__tokens) / self.rate)
+            time.sleep(wait)
+
+    def update(self, response: requests.Response) -> None:
+        """Adapts rate to the rate limit headers of Zenodo's response
+
+        Parameters
+        ----------
+        response : requests.Response
+            Response of Zenodo API
+        """
+
+        try:
+            remaining = int(response.headers["X-RateLimit-Remaining"])
+            seconds = self.__seconds_until(float(response.headers["X-RateLimit-Reset"]))
+        except (KeyError, ValueError):
+            return
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            if remaining <= 0:
+                self.__paused_until = max(self.__paused_until, now + seconds)
+                self.__tokens = 0
+            else:
+                self.__tokens = min(self.__tokens, remaining)
+                self.rate = min(self.max_rate, remaining / seconds) if seconds > 0 else self.max_rate
+
+    def backoff(self, response: requests.Response, attempt: int) -> None:
+        """Pauses all requests after a request has been rejected (status 429)
+
+        The pause is taken from the Retry-After header or from the X-RateLimit-Reset header. 
+        If Zenodo sends neither of them, the pause grows exponentially with the number of attempts.
+
+        Parameters
+        ----------
+        response : requests.Response
+            Response of Zenodo API with status 429
+        attempt : int
+            Number of previous attempts of the request
+        """
+
+        try:
+            seconds = float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            try:
+                seconds = self.__seconds_until(float(response.headers["X-RateLimit-Reset"]))
+            except (KeyError, ValueError):
+                seconds = 2 ** attempt
+        logging.warning(f"Rate limit of Zenodo API has been exceeded. Pause requests for {seconds:.1f} seconds.")
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            self.__paused_until = max(self.__paused_until, now + seconds)
+            self.__tokens = 0
+
+    # add tokens for time since last refill
+    def __refill(self, now: float) -> None:
+        self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    # return seconds until reset (Zenodo sends a unix timestamp)
+    @staticmethod
+    def __seconds_until(reset: float) -> float:
+        if reset > 1e9:
+            return max(reset - time.time(), 0)
+        return max(reset, 0)
+
+
+class ZenodoRetry(Retry):
+    """Retry policy for requests to Zenodo API
+
+    Retries requests if Zenodo responds with a server error (5xx) or the response 
+    couldn't be read (e.g. read timeout). POST requests (e.g. create or publish deposition) 
+    are not idempotent, so they are not retried once they have been sent (see IDEMPOTENT_METHODS). 
+    Requests rejected by the rate limit (429) are retried by ZenodoSession.
+    """
+
+    # methods retried after read errors and server errors (failed connections are retried for all methods)
+    IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE"])
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429 or method and method.upper() == "POST":
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class ZenodoSession(requests.Session):
+    """Session for requests to Zenodo API
+
+    Keeps connections to Zenodo alive in a connection pool, limits the rate of 
+    requests (see RateLimiter), retries failed requests (see ZenodoRetry), 
+    sets a default timeout for all requests and records latency, status code 
+    and transferred bytes of each request (see metrics.Metrics).
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: tuple = (10, 300), retries: int = 5, backoff_factor: float = 1,
+                 rate_limiter: RateLimiter = None, offline: bool = False, metrics: metrics.Metrics = None):
+        """Constructor of ZenodoSession class
+
+        Parameters
+        ----------
+        pool_size : int
+            Maximum number of connections kept alive per host
+        timeout : tuple
+            Connect and read timeout in seconds for requests without explicit timeout
+        retries : int
+            Maximum number of retries of a request
+        backoff_factor : float
+            Factor for exponential backoff between retries after server errors
+        rate_limiter : RateLimiter
+            Rate limiter for all requests of session (Default: 100 requests per minute)
+        offline : bool
+            Determines whether requests are refused, because the application runs in offline mode (Default: False)
+        metrics : metrics.Metrics
+            Metrics recording the requests of session (Default: None, requests aren't recorded)
+        """
+
+        super().__init__()
+        self.timeout = timeout
+        self.retries = retries
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.offline = offline
+        self.metrics = metrics
+        retry = ZenodoRetry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff_factor,
+                            status_forcelist=[500, 502, 503, 504], allowed_methods=ZenodoRetry.IDEMPOTENT_METHODS,
+                            respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        if self.offline:
+            raise Exception(f"Request {method} {url} can't be sent in offline mode.")
+        kwargs.setdefault("timeout", self.timeout)
+        # rewind file objects before request is sent again
+        body = kwargs.get("data")
+        position = body.tell() if hasattr(body, "seek") else None
+
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+            response = super().request(method, url, **kwargs)
+            self.rate_limiter.update(response)
+            if self.metrics is not None:
+                self.__record(method, response, time.perf_counter() - start, _get_body_size(response.request.body, position))
+            if response.status_code != 429 or attempt == self.retries:
+                return response
+            self.rate_limiter.backoff(response, attempt)
+            if position is not None:
+                body.seek(position)
+
+    # record latency, status code and transferred bytes of request
+    def __record(self, method: str, response: requests.Response, seconds: float, sent: int) -> None:
+        method = method.upper()
+        self.metrics.increment("api_requests_total", method=method, status=response.status_code)
+        self.metrics.observe("api_request_seconds", seconds, method=method)
+        self.metrics.observe("api_response_bytes", len(response.content), buckets=metrics.BYTES_BUCKETS, method=method)
+        self.metrics.increment("api_sent_bytes_total", sent, method=method)
+
+
 class Connection:
     """Connection class for interaction with Zenodo API 
     
@@ -51,6 +265,30 @@ class Connection:
     params : dict
         Parameters for Zenodo API connection.
 
+    concurrency : int
+        Maximum number of bundles uploaded (or depositions published/deleted) at the same time.
+
+    retry_failed : bool
+        Determines whether publish and delete are only run for depositions which failed in the previous run.
+
+    bulk : bool
+        Determines whether depositions are retrieved from the paged deposition list.
+
+    query : str
+        Search query to filter deposition list in bulk mode.
+
+    offline : bool
+        Determines whether depositions are only read from the response cache.
+
+    session : ZenodoSession
+        Pooled session used for all requests to Zenodo API (see api_* settings in config.yml).
+
+    executor : ThreadPoolExecutor
+        Worker pool sending the requests, e.g. shared by the conferences of a batch (None if a pool is created for each action).
+
+    metrics : metrics.Metrics
+        Durations of the actions and latency, status code and transferred bytes of the requests of the run.
+
     Methods
     -------
     upload
@@ -69,7 +307,9 @@ class Connection:
         Saves the abstracts' metadata of conference for annual package.
     """
 
-    def __init__(self, name:str, token:str, productive: bool) -> None:
+    def __init__(self, name:str, token:str, productive: bool, concurrency: int = 1, retry_failed: bool = False,
+                 bulk: bool = False, query: str = None, offline: bool = False, base_url: str = None,
+                 session: ZenodoSession = None, executor: ThreadPoolExecutor = None) -> None:
         """Constructor of Connection class
 
         Parameters
@@ -82,13 +322,50 @@ class Connection:
 
         productive : bool
             Determines whether the productive system or the Zenodo sandbox (for testing purposes) is used.
+
+        concurrency : int
+            Maximum number of bundles uploaded (or depositions published/deleted) at the same time (Default: 1).
+
+        retry_failed : bool
+            Determines whether publish and delete are only run for depositions which failed in the previous run (Default: False).
+
+        bulk : bool
+            Determines whether get_metadata and write_identifiers_for_posters get the depositions from the paged 
+            deposition list instead of one by one (Default: False).
+
+        query : str
+            Search query to filter deposition list in bulk mode, e.g. 'conference_acronym:"DHd2024"' (Default: None).
+
+        offline : bool
+            Determines whether depositions are only read from the response cache. No requests are sent to Zenodo (Default: False).
+
+        base_url : str
+            Base url of Zenodo API, e.g. of a local stand-in for tests and benchmarks (Default: api_base_url in config.yml, 
+            if not set Zenodo's productive system or sandbox).
+
+        session : ZenodoSession
+            Session shared with other connections, e.g. by the conferences of a batch, so that connection pool 
+            and rate limiter are reused. The session records the requests in the metrics of this connection 
+            (Default: None, a session is created, see create_session).
+
+        executor : ThreadPoolExecutor
+            Worker pool shared with other connections, needs at least `concurrency` threads 
+            (Default: None, a pool with `concurrency` threads is created for each action).
         """
 
         self.conference = name
         self.token = token
+        self.concurrency = max(concurrency, 1)
+        self.retry_failed = retry_failed
+        self.bulk = bulk
+        self.query = query
+        self.offline = offline
         
-        # set url based on testing (zenodo sandbox) or productive
-        if productive:
+        # set url based on configured base url or testing (zenodo sandbox) or productive
+        base_url = base_url or config.get('api_base_url')
+        if base_url:
+            self.url = base_url.rstrip('/') + '/api/deposit/depositions'
+        elif productive:
             self.url = 'https://zenodo.org/api/deposit/depositions'
         else:
             self.url = 'https://sandbox.zenodo.org/api/deposit/depositions'
@@ -97,72 +374,101 @@ class Connection:
         self.headers = {"Content-Type": "application/json"}
         self.params = {'access_token': self.token}
 
-        logging.basicConfig(filename=config['logging_dir'] + self.conference +'_api.log', filemode='w+', level=logging.INFO)
+        # set session for all requests to zenodo api
+        self.metrics = metrics.Metrics({"run": "api", "conference": self.conference})
+        self.session = session or create_session(self.concurrency, offline)
+        self.session.metrics = self.metrics
+        self.executor = executor
+
+        bundles.set_logging(config['logging_dir'] + self.conference +'_api.log')
 
-    def upload(self) -> None:
+    def upload(self, conference: bundles.Conference = None, audit: bool = False, link_mode: str = "copy") -> None:
         """Upload of abstracts
 
         Upload of abstracts to Zenodo.
-        In order to upload the abstracts the files must be available in the required bundle structure.
+        In order to upload the abstracts the files must be available in the required bundle structure, 
+        unless the bundles are taken from the conference's input directory (see parameter conference).
+        Bundles are read (or created) by a producer while up to `concurrency` bundles are uploaded 
+        at the same time, all requests share the rate limiter of the session. The deposition ids are 
+        written in the (sorted) order of the bundles.
+        Each step of the upload is recorded in the conference's upload journal. If the upload is 
+        interrupted, the next run reuses the created drafts and uploads only the missing files and metadata.
+        Files of reused drafts are compared with the files in the deposition's bucket by MD5 checksum 
+        and only uploaded if they have changed.
+        If the upload of a bundle fails, the other bundles are uploaded nevertheless. The failed bundles 
+        are recorded in the journal and reported at the end, the next run resumes their uploads.
+
+        Parameters
+        ----------
+        conference : bundles.Conference
+            Conference whose files are assigned and whose json metadata is created in memory. The files are 
+            uploaded directly from the conference's input directory without creating the bundle structure first 
+            (Default: None, bundles are read from bundle structure under configured output_base)
+        audit : bool
+            Determines whether the bundle structure is written to configured output_base as audit artifact, 
+            if bundles are taken from the conference's input directory (Default: False)
+        link_mode : str
+            Mode to place the pdf and xml files in the bundle structure written for audit (see bundles.LINK_MODES, Default: "copy")
+
+        Raises
+        ------
+        Exception
+            If bundles could not be uploaded.
         """
 
         logging.info("Upload bundles..")
 
-        # create textfile to store deposition ids
-        dep_file = open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "w+")
+        # get bundles for upload
+        if conference is None:
+            bundle_base = sanity.readable_dir(os.path.join(config['output_base'], self.conference))
+            logging.info(f"Bundle base directory for conference {self.conference}: {bundle_base}")
+            conference_bundles = sorted(os.path.join(bundle_base, bundle) for bundle in os.listdir(bundle_base)
+                                        if os.path.isdir(os.path.join(bundle_base, bundle)))
+            bundle_items = (_read_bundle(bundle) for bundle in conference_bundles)
+        else:
+            logging.info(f"Upload bundles of conference {conference.name} from input directory {conference.source}")
+            bundle_items = conference.get_bundles(audit=audit, link_mode=link_mode)
+
+        # create textfile to store deposition ids (of previous and current run) and upload bundles
+        with UploadJournal(config['journals_dir'] + self.conference + ".jsonl", self.url) as upload_journal, \
+                ChecksumCache(config['journals_dir'] + self.conference + "_md5.json") as checksums, \
+                open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "w") as dep_file:
+            failed = asyncio.run(self.__upload_bundles(bundle_items, dep_file, upload_journal, checksums))
+        if failed:
+            raise Exception(f"{len(failed)} bundles could not be uploaded: {failed}. Please check logging file for more information.")
+        logging.info("..finished")
 
-        # upload bundles
-        bundle_base = sanity.readable_dir(os.path.join(config['output_base'], self.conference))
-        logging.info(f"Bundle base directory for conference {self.conference}: {bundle_base}")
-        conference_bundles = [os.path.join(bundle_base, bundle) for bundle in os.listdir(bundle_base)]
+    def write_metrics(self) -> None:
+        """Writes metrics of run
+
+        Writes the durations of the actions and the latency, status code and transferred bytes 
+        of the requests to [CONFERENCE]_api.json (and [CONFERENCE]_api.prom if metrics_prometheus 
+        is set) under configured metrics_dir (see config.yml file).
+        """
+
+        self.metrics.write(config['metrics_dir'] + self.conference + "_api", prometheus=config.get('metrics_prometheus', False))
 
-        for bundle in conference_bundles:
-            if os.path.isdir(bundle):
-                # get bucket url and deposition id
-                bucket_url, deposition_id = self.__get_upload_params()
-                # write deposition id for bundle in textfile
-                dep_file.write(str(deposition_id) + "\n")
-                # get bundle files for upload
-                bundle_json, bundle_publications = bundles.get_bundle_files(bundle)
-                # upload bundle files
-                for publication in bundle_publications:
-                    with open(publication, "rb") as pub:
-                        r = requests.put(
-                            "%s/%s" % (bucket_url, os.path.basename(publication)),
-                            data=pub,
-                            params=self.params)
-                        logging.info(f"Put publication file {publication}: {r.status_code}")
-                # upload bundle metadata
-                with open(bundle_json) as json_file:
-                    data = json.load(json_file)
-                r = requests.put(self.url+'/%s' % deposition_id,
-                                params=self.params, data=json.dumps(data), headers=self.headers)
-                if r.status_code in [400, 401, 403, 404, 409, 415, 429]:
-                    logging.info(f"Upload for bundle {bundle} didn't go through. Please check resource.")
-                    logging.info(f"Status code: {r.status_code}.")
-                    logging.info(r.json())
-                time.sleep(1)
-        logging.info("..finished")
-    
     def delete(self) -> None:
         """Deletes drafts of given conference from Zenodo
+
+        Up to `concurrency` drafts are deleted at the same time. The result for each deposition is 
+        written to the result file delete_[CONFERENCE].csv (see __bulk_request).
         """
 
         logging.info("Delete drafts..")
 
-        # get deposition ids
-        dep_file = open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r")
-        dep_ids = [line.replace("\n", "") for line in dep_file]
-
         # delete drafts with given deposition ids
-        for deposition_id in dep_ids:
-            dep_url = self.url + '/' + deposition_id
-            r = requests.delete(dep_url, params= self.params )
-            if r.status_code in [400, 401, 403, 404, 409, 415, 429]:
-                logging.info(f"Could not delete draft with deposition id {deposition_id}. Please check resource.")
-                logging.info(f"Status code: {r.status_code}.")
-                logging.info(r.json())
-            time.sleep(1)
+        results = self.__bulk_request("delete", lambda deposition_id: self.session.delete(self.url + '/' + deposition_id, params=self.params))
+
+        # remove deleted drafts from upload journal
+        with UploadJournal(config['journals_dir'] + self.conference + ".jsonl", self.url) as upload_journal:
+            for result in results:
+                if _succeeded(result):
+                    upload_journal.deposition_deleted(result["deposition_id"])
+                else:
+                    logging.info(f"Could not delete draft with deposition id {result['deposition_id']}. Please check resource.")
+                    logging.info(f"Status code: {result['status_code']}.")
+                    logging.info(result["error"])
         logging.info("..finished")
 
     def update(self) -> None:
@@ -175,58 +481,57 @@ class Connection:
         logging.info("Update metadata of depositions..")
 
         # get deposition ids
-        dep_file = open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r")
-        dep_ids = [line.replace("\n", "") for line in dep_file]
-
-        for deposition_id in dep_ids:
-            logging.info(deposition_id)
-            # unlock already submitted deposition for editing
-            r1 = requests.post(self.url + '/' + deposition_id + '/actions/edit', params=self.params)
-            time.sleep(1)
-
-            # update metadata
-            dep_url = self.url + '/' + deposition_id
-            r2 = requests.get(dep_url, params=self.params)
-
-            # add related identifiers for each poster
-            logging.info(r2.json())
-            metadata = r2.json()["metadata"]
-            logging.info(f"Metadata: {metadata}")
-            print(metadata['related_identifiers'])
-            for elem in metadata['related_identifiers']:
-                if elem['relation'] == 'isPartOf':
-                    elem['identifier'] = '10.5281/zenodo.10686564'
-            print(metadata['related_identifiers'])
-
-            logging.info(f"Updated metadata: {metadata}")
-            r3 = requests.put(self.url+'/%s' % deposition_id,
-                            params=self.params, data=json.dumps({'metadata': metadata}), headers=self.headers)
-            if r3.status_code in [400, 401, 403, 404, 409, 415, 429]:
-                logging.info(f"Update for draft with deposition id {deposition_id} didn't go through. Please check resource.")
-                logging.info(f"Error Message: {r3.json()}")
+        with open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r") as dep_file:
+            dep_ids = [line.replace("\n", "") for line in dep_file]
+
+        with self.__open_response_cache() as response_cache:
+            for deposition_id in dep_ids:
+                logging.info(deposition_id)
+                # unlock already submitted deposition for editing
+                r1 = self.session.post(self.url + '/' + deposition_id + '/actions/edit', params=self.params)
+
+                # update metadata
+                dep_url = self.url + '/' + deposition_id
+                status_code, deposition = self.__get_json(dep_url, response_cache)
+
+                # add related identifiers for each poster
+                logging.debug("Deposition: %s", deposition)
+                metadata = deposition["metadata"]
+                logging.debug("Metadata: %s", metadata)
+                logging.debug("Related identifiers: %s", metadata['related_identifiers'])
+                for elem in metadata['related_identifiers']:
+                    if elem['relation'] == 'isPartOf':
+                        elem['identifier'] = '10.5281/zenodo.10686564'
+                logging.debug("Updated related identifiers: %s", metadata['related_identifiers'])
+
+                logging.debug("Updated metadata: %s", metadata)
+                r3 = self.session.put(self.url+'/%s' % deposition_id,
+                                params=self.params, data=json.dumps({'metadata': metadata}), headers=self.headers)
+                if r3.ok:
+                    response_cache.invalidate(dep_url)
+                if r3.status_code in [400, 401, 403, 404, 409, 415, 429]:
+                    logging.info(f"Update for draft with deposition id {deposition_id} didn't go through. Please check resource.")
+                    logging.info(f"Error Message: {r3.json()}")
 
         logging.info("finished")
 
     def publish(self) -> None:
         """Publishes drafts of given conference in Zenodo. 
+
+        Up to `concurrency` drafts are published at the same time. The result for each deposition is 
+        written to the result file publish_[CONFERENCE].csv (see __bulk_request).
         """
 
         logging.info("Publish..")
 
-        # get deposition ids
-        dep_file = open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r")
-        dep_ids = [line.replace("\n", "") for line in dep_file]
-
         # publish drafts
-        for deposition_id in dep_ids:
-            logging.info(deposition_id)
-            dep_url = self.url + '/' + deposition_id + '/actions/publish'
-            r = requests.post(dep_url, params=self.params )
-            if r.status_code in [400, 401, 403, 404, 409, 415, 429]:
-                logging.warning(f"Publishing for draft with deposition id {deposition_id} didn't go through. Please check deposition.")
-                logging.warning(f"Status code: {r.status_code}.")
-                logging.warning(f" {r.json()}.")
-            time.sleep(1)
+        results = self.__bulk_request("publish", lambda deposition_id: self.session.post(self.url + '/' + deposition_id + '/actions/publish', params=self.params))
+
+        for result in results:
+            if not _succeeded(result):
+                logging.warning(f"Publishing for draft with deposition id {result['deposition_id']} didn't go through. Please check deposition.")
+                logging.warning(f"Status code: {result['status_code']}.")
+                logging.warning(f" {result['error']}.")
 
         logging.info("..finished")
 
@@ -240,8 +545,15 @@ class Connection:
         logging.info("Get the abstracts' metadata for annual package..")
 
         # get depositions ids of conference
-        dep_file = open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r")
-        dep_ids = [line.replace("\n", "") for line in dep_file]
+        with open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r") as dep_file:
+            dep_ids = [line.replace("\n", "") for line in dep_file]
+
+        # get depositions with metadata and files
+        depositions = self.__get_depositions(dep_ids, files=True)
+
+        # get index of conference's TEI files (xml:id and publication category)
+        tei_index = tei.TeiIndex(os.path.join(config['output_base'], self.conference),
+                                 config['manifests_dir'] + self.conference + "_tei.json")
 
         with open(config['packages_dir'] + self.conference + ".csv", 'w', encoding='utf-8', newline='') as csv_file:
 
@@ -256,25 +568,21 @@ class Connection:
 
             for index, deposition_id in enumerate(dep_ids):
 
-                dep_url = self.url+ '/' + deposition_id
-                # get request for bundle metadata
-                r = requests.get(dep_url, params=self.params )
-                # get request for bundle files
-                r_files = requests.get(dep_url + '/files', params=self.params )
+                deposition = depositions[deposition_id]
 
-                if r.status_code in [200, 201, 202]:
+                if deposition is not None:
                     
                     if self.conference == "FORGE":
-                        bundle_info = {"title": r.json()["title"],"conceptdoi": r.json()["conceptdoi"]}
+                        bundle_info = {"title": deposition["title"],"conceptdoi": deposition["conceptdoi"]}
                         
                     else: 
                         # get deposition metadata
-                        bundle_info = r.json()["metadata"]
+                        bundle_info = deposition["metadata"]
 
                         # get conceptdoi
-                        bundle_info.update({"conceptdoi": r.json()["conceptdoi"]})
+                        bundle_info.update({"conceptdoi": deposition["conceptdoi"]})
                         # bundle_info.update({"conceptdoi": "test"})
-                        bundle_info.update({"doi": r.json()["doi"]})
+                        bundle_info.update({"doi": deposition["doi"]})
                         # bundle_info.update({"doi": "test"})
                         # remove html-tag from description
                         try:
@@ -285,47 +593,27 @@ class Connection:
                         bundle_info["conference_title"] = bundle_info["conference_title"].replace("\n","")
 
                         # add filenames of deposition files
-                        bundle_info["files"] = [elem["filename"] for elem in r_files.json()]
+                        bundle_info["files"] = [elem["filename"] for elem in deposition["files"]]
 
                         # get publication category (e.g. poster, panel, ...) from TEI-file
-                        if any(elem["filename"].endswith(".xml") for elem in r_files.json()):
-                            for elem in r_files.json():
+                        if any(elem["filename"].endswith(".xml") for elem in deposition["files"]):
+                            for elem in deposition["files"]:
                                 if elem["filename"].endswith(".xml"):
                                     file_name = elem["filename"]
-                                    for root, dirs, files in os.walk(os.path.join(config['output_base'], self.conference)):
-                                        for f in files:
-                                            if f == file_name:
-                                                xml_path = os.path.join(root, f)
-                                                try:
-                                                    # parse xml file
-                                                    tree = ET.parse(xml_path)
-                                                    # get xml id
-                                                    root = tree.getroot()
-                                                    xml_id = root.attrib["{http://www.w3.org/XML/1998/namespace}id"]
-                                                    key_tags = tree.findall(".//TEI:keywords", namespace)
-
-                                                    for elem in key_tags:
-                                                        if elem.attrib["n"]=="subcategory":
-                                                            pub_format = elem.find("TEI:term", namespace).text
-
-                                                    bundle_info["xml_id"] = xml_id
-                                                    bundle_info["format"] = pub_format
-                    
-                                                except KeyError:
-                                                    logging.info(f"Couldn't find correct category tag for file {file_name}. Please check.")
+                                    tei_entry = tei_index.get(file_name)
+                                    if tei_entry is None:
+                                        continue
+                                    if tei_entry["xml_id"] is None:
+                                        logging.info(f"Couldn't find correct category tag for file {file_name}. Please check.")
+                                        continue
+                                    bundle_info["xml_id"] = tei_entry["xml_id"]
+                                    bundle_info["format"] = tei_entry["format"]
                         
                         # self.__create_metadata_element(bundle_info, root)
 
-                        time.sleep(1)                        
-                else:
-                    logging.info(r.status_code)
-                    logging.info(f"Status code for deposition with id {deposition_id} is not 200. Please check the deposition.")
-
                 # write bundle data in csv file
-                logging.info(bundle_info)
-                logging.info(fieldnames)
+                logging.debug("Metadata for annual package: %s", bundle_info)
                 writer.writerow(bundle_info)
-                time.sleep(1)
 
         logging.info('... finished')
 
@@ -335,7 +623,11 @@ class Connection:
         Find the related abstract by matching titles. Changes relation, identifier and resource_type of first
         related_identifier for each publication (metadata entry). Relation changes from 'isPartOf' to 'isSupplementTo'
         , identifier will be overwritten by the abstract's concept doi and the resource_type changes from
-        'publication-book' to 'publication-conferencepaper'."""
+        'publication-book' to 'publication-conferencepaper'.
+
+        Titles are matched in normalized form (see bundles.titles), so that typographic differences don't prevent 
+        a match. Titles which aren't equal in normalized form are matched if their similarity reaches the configured 
+        title_match_threshold. Each match is written to the review report posters_[CONFERENCE].csv."""
 
         logging.info("Write abstract's doi as related identifier..")
 
@@ -350,69 +642,197 @@ class Connection:
         # get list of titles from depositions
 
         # get depositions ids of conference
-        dep_file = open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r")
-        dep_ids = [line.replace("\n", "") for line in dep_file]
+        with open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r") as dep_file:
+            dep_ids = [line.replace("\n", "") for line in dep_file]
 
         # get doi and title from each deposition
+        depositions = self.__get_depositions(dep_ids)
         for index, deposition_id in enumerate(dep_ids):
 
-            dep_url = self.url + '/' + deposition_id
-            # get request for bundle metadata
-            r = requests.get(dep_url, params=self.params)
+            deposition = depositions[deposition_id]
 
-            if r.status_code in [200, 201, 202]:
+            if deposition is not None:
                 # get deposition metadata
-                logging.info(r.json()["title"])
+                logging.info(deposition["title"])
                 try:
-                    depositions_info.append([r.json()["title"].replace("\n",""), r.json()["conceptdoi"]])
-                    time.sleep(0.500)
+                    depositions_info.append([deposition["title"].replace("\n",""), deposition["conceptdoi"]])
                 except KeyError:
-                    logging.warning(r.json())
-            else:
-                logging.info(r.status_code)
-                logging.info(
-                    f"Status code for deposition with id {deposition_id} is not 200. Please check the deposition.")
-        logging.info(f"Information from Depositions: {depositions_info}")
+                    logging.warning(f"Deposition {deposition_id} has no title or concept doi.")
+                    logging.debug("Deposition: %s", deposition)
+        logging.debug("Information from Depositions: %s", depositions_info)
 
-        titles = [dep[0].replace(" ", "") for dep in depositions_info]
+        # index titles of depositions (exact and fuzzy matching)
+        title_index = titles.TitleIndex([dep[0] for dep in depositions_info])
+        threshold = config.get('title_match_threshold', 0.9)
 
 
         # modify related identifiers for all poster publications
 
-        # create root element for conference's final metadata file
-        tree = ET.parse(metadata_file)
-        root = tree.getroot()
-        dates = root.findall('metadata')
-
+        # stream conference's final metadata file and modify each poster publication
         counter = 0
-        for i, date in enumerate(dates):
-            logging.info(f"Processing entry {i} with title {date.find('title').text}..")
-            name = date.find("title").text.replace(" ", "")
-            name1 = name.replace("\n", "")
-            if name1 in titles:
-                logging.info(f"Title: {date.find('title').text}")
+        index = 0
+        report = []
+
+        def modify(date):
+            nonlocal counter, index
+            title = date.find("title").text
+            logging.info(f"Processing entry {index} with title {title}..")
+            match = title_index.match(title, min_score=threshold)
+            if match["position"] is None:
+                # best candidate below threshold for review
+                match = title_index.match(title)
+            matched = match["position"] is not None and match["score"] >= threshold
+            if match["exact"]:
+                status = "exact"
+            elif matched:
+                status = "fuzzy"
+            else:
+                status = "rejected" if match["position"] is not None else "missing"
+            report.append({"index": index, "poster_title": title, "status": status, "score": round(match["score"], 3),
+                           "abstract_title": depositions_info[match["position"]][0] if match["position"] is not None else "",
+                           "conceptdoi": depositions_info[match["position"]][1] if matched else ""})
+            if matched:
+                logging.info(f"Title: {title} (similarity {match['score']:.3f})")
                 rel_identifier = date.find("related_identifiers")[0]
                 rel_identifier.find("relation").text = "isSupplementTo"
                 rel_identifier.find("resource_type").text = "publication-conferencepaper"
                 # ersetze related identifier
-                rel_identifier.find("identifier").text = depositions_info[titles.index(name1)][1]
+                rel_identifier.find("identifier").text = depositions_info[match["position"]][1]
                 counter = counter + 1
             else:
-                logging.warning(f"Identifier for publication with title {date.find('title').text} could not be modified. Please check manually.")
+                logging.warning(f"Identifier for publication with title {title} could not be modified. Please check manually.")
+            index = index + 1
 
         # write in xml file
-        tree.write(os.path.join(config['input_base'], self.conference + '_posters', self.conference + '_posters_related_ids.xml'))
+        records.rewrite(metadata_file, os.path.join(config['input_base'], self.conference + '_posters', self.conference + '_posters_related_ids.xml'), modify)
         logging.info(f"{counter} related identifiers have been modified.")
+
+        # write review report of matched titles
+        report_file = config['depositions_dir'] + 'posters_' + self.conference + ".csv"
+        with open(report_file, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=["index", "poster_title", "status", "score", "abstract_title", "conceptdoi"])
+            writer.writeheader()
+            writer.writerows(report)
+        logging.info(f"{sum(row['status'] == 'fuzzy' for row in report)} fuzzy matches and "
+                     f"{sum(row['status'] in ['rejected', 'missing'] for row in report)} unmatched titles, please review {report_file}.")
         logging.info('... finished')
 
+    # upload bundles with up to `concurrency` bundles at the same time, bundles are read (or created)
+    # by a producer in its own thread and passed to the uploading consumers by a bounded queue,
+    # returns names of bundles whose upload failed (in order of bundles)
+    async def __upload_bundles(self, bundle_items, dep_file, upload_journal: UploadJournal,
+                               checksums: ChecksumCache) -> list:
+        deposition_ids = {}
+        failed = {}
+        written = 0
+
+        # write deposition ids of all bundles up to the first bundle without result (failed bundles without deposition are skipped)
+        def write_deposition_ids():
+            nonlocal written
+            while written in deposition_ids:
+                if deposition_ids[written] is not None:
+                    dep_file.write(str(deposition_ids[written]) + "\n")
+                written += 1
+            dep_file.flush()
+            os.fsync(dep_file.fileno())
+
+        queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        loop = asyncio.get_running_loop()
+
+        with self.__get_executor() as executor, ThreadPoolExecutor(max_workers=1) as producer:
+
+            # pass bundles to consumers (in order of bundles), followed by one stop signal for each consumer
+            async def produce():
+                items = iter(bundle_items)
+                index = 0
+                try:
+                    while True:
+                        item = await loop.run_in_executor(producer, next, items, None)
+                        if item is None:
+                            break
+                        await queue.put((index, item))
+                        index += 1
+                finally:
+                    for _ in range(self.concurrency):
+                        await queue.put(None)
+
+            async def consume():
+                while True:
+                    entry = await queue.get()
+                    if entry is None:
+                        return
+                    index, item = entry
+                    # failed upload of a bundle doesn't stop the uploads of the other bundles
+                    try:
+                        await upload_bundle(index, item)
+                    except Exception as error:
+                        logging.warning(f"Upload of bundle {item['name']} failed: {error}")
+                        upload_journal.upload_failed(item["name"], str(error))
+                        failed[index] = item["name"]
+                        deposition_ids.setdefault(index, None)
+                        write_deposition_ids()
+
+            async def upload_bundle(index, item):
+                bundle_name = item["name"]
+                # get bucket url and deposition id (of draft created by previous run)
+                bucket_url, deposition_id = upload_journal.get_deposition(bundle_name)
+                # checksums of files in bucket, requested for drafts of previous runs (new drafts have empty buckets)
+                bucket_checksums = None if deposition_id is not None else {}
+                if deposition_id is None:
+                    bucket_url, deposition_id = await loop.run_in_executor(executor, self.__get_upload_params)
+                    upload_journal.deposition_created(bundle_name, deposition_id, bucket_url)
+                else:
+                    logging.info(f"Resume upload for bundle {bundle_name} with deposition id {deposition_id}")
+                # write deposition id for bundle in textfile
+                deposition_ids[index] = deposition_id
+                write_deposition_ids()
+                # upload bundle files (unless uploaded by previous run)
+                for publication in item["publications"]:
+                    if upload_journal.is_uploaded(bundle_name, publication):
+                        logging.info(f"Publication file {publication} has already been uploaded.")
+                        continue
+                    if bucket_checksums is None:
+                        bucket_checksums = await loop.run_in_executor(executor, self.__get_bucket_checksums, bucket_url)
+                    if os.path.basename(publication) in bucket_checksums:
+                        checksum = await loop.run_in_executor(executor, checksums.md5, publication)
+                        if checksum == bucket_checksums[os.path.basename(publication)]:
+                            logging.info(f"Publication file {publication} is unchanged in bucket.")
+                            upload_journal.file_uploaded(bundle_name, publication)
+                            continue
+                    r = await loop.run_in_executor(executor, self.__put_file, bucket_url, publication)
+                    if not r.ok:
+                        logging.debug("Response: %s", r.text)
+                        raise Exception(f"Publication file {publication} could not be uploaded (status code {r.status_code}).")
+                    upload_journal.file_uploaded(bundle_name, publication)
+                # upload bundle metadata (json file of bundle structure or json metadata created in memory)
+                bundle_json = item.get("json")
+                if upload_journal.is_uploaded(bundle_name, bundle_json) if bundle_json else \
+                        upload_journal.is_metadata_uploaded(bundle_name, item["metadata"]):
+                    logging.info(f"Metadata of bundle {bundle_name} has already been uploaded.")
+                    return
+                r = await loop.run_in_executor(executor, self.__put_metadata, deposition_id, item["metadata"])
+                if not r.ok:
+                    logging.debug("Response: %s", r.text)
+                    raise Exception(f"Metadata didn't go through (status code {r.status_code}). Please check resource.")
+                if bundle_json:
+                    upload_journal.file_uploaded(bundle_name, bundle_json)
+                else:
+                    upload_journal.metadata_uploaded(bundle_name, item["metadata"])
+
+            await asyncio.gather(produce(), *(consume() for _ in range(self.concurrency)))
+        return [failed[index] for index in sorted(failed)]
+
     # empty post to zenodo in order to get bucket url and deposition id
     def __get_upload_params(self):
-        r = requests.post(self.url,
+        r = self.session.post(self.url,
             params= self.params,
             json={},
             headers= self.headers)
 
         logging.info(f"Empty post to {self.url} with given access token: {r.status_code}")
+        if not r.ok:
+            logging.debug("Response: %s", r.text)
+            raise Exception(f"Deposition could not be created (status code {r.status_code}).")
         bucket_url = r.json()["links"]["bucket"]
         logging.info(f"Using the following bucket url: {bucket_url}")
         deposition_id = r.json()['id']
@@ -420,6 +840,149 @@ class Connection:
 
         return bucket_url, deposition_id
 
+    # return deposition for each deposition id (None if deposition couldn't be retrieved)
+    def __get_depositions(self, dep_ids: list, files: bool = False) -> dict:
+        depositions = {}
+        if self.bulk and not self.offline:
+            depositions = self.__list_depositions(dep_ids)
+
+        # get depositions (not found in deposition list) one by one, revalidated with response cache
+        with self.__open_response_cache() as response_cache:
+            for deposition_id in dep_ids:
+                if deposition_id in depositions:
+                    continue
+                dep_url = self.url + '/' + deposition_id
+                # get request for bundle metadata
+                status_code, deposition = self.__get_json(dep_url, response_cache)
+                if status_code in [200, 201, 202]:
+                    depositions[deposition_id] = deposition
+                    if files:
+                        # get request for bundle files
+                        _, deposition_files = self.__get_json(dep_url + '/files', response_cache)
+                        depositions[deposition_id]["files"] = deposition_files
+                else:
+                    logging.info(status_code)
+                    logging.info(f"Status code for deposition with id {deposition_id} is not 200. Please check the deposition.")
+                    depositions[deposition_id] = None
+        return depositions
+
+    # open cache of deposition responses
+    def __open_response_cache(self) -> ResponseCache:
+        return ResponseCache(config['cache_dir'] + self.conference + ".sqlite", ttl=config.get('api_cache_ttl', 30 * 24 * 3600),
+                             max_size=config.get('api_cache_size', 500 * 1024 * 1024))
+
+    # return status code and json data of get request, cached responses are revalidated (or served in offline mode)
+    def __get_json(self, url: str, response_cache: ResponseCache) -> tuple:
+        data, headers = response_cache.get(url)
+        if self.offline:
+            if data is None:
+                logging.warning(f"No cached response for {url} in offline mode.")
+                return None, None
+            return 200, data
+        r = self.session.get(url, params=self.params, headers=headers)
+        if r.status_code == 304 and data is not None:
+            response_cache.touch(url)
+            return 200, data
+        if not r.ok:
+            return r.status_code, None
+        response_cache.store(url, r.json(), r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return r.status_code, r.json()
+
+    # return depositions with given ids from paged deposition list (including metadata and files)
+    def __list_depositions(self, dep_ids: list) -> dict:
+        wanted = set(dep_ids)
+        depositions = {}
+        page_size = config.get('api_page_size', 100)
+        page = 0
+        while wanted - depositions.keys():
+            page = page + 1
+            params = dict(self.params, size=page_size, page=page)
+            if self.query:
+                params.update({"q": self.query})
+            r = self.session.get(self.url, params=params)
+            if not r.ok:
+                logging.warning(f"Could not get page {page} of deposition list: {r.status_code}.")
+                break
+            for deposition in r.json():
+                if str(deposition["id"]) in wanted:
+                    depositions[str(deposition["id"])] = deposition
+            if len(r.json()) < page_size:
+                break
+        logging.info(f"{len(depositions)} of {len(wanted)} depositions found in {page} pages of deposition list.")
+        return depositions
+
+    # send request for each deposition id (in worker pool) and write result file
+    def __bulk_request(self, action: str, send) -> list:
+        # get deposition ids
+        with open(config['depositions_dir'] + 'depositions_' + self.conference + ".txt", "r") as dep_file:
+            dep_ids = [line.replace("\n", "") for line in dep_file if line.strip()]
+
+        # get results of previous run, only failed depositions are retried
+        result_file = config['depositions_dir'] + action + '_' + self.conference + ".csv"
+        previous = {}
+        if self.retry_failed:
+            try:
+                with open(result_file, 'r', encoding='utf-8', newline='') as csv_file:
+                    previous = {row["deposition_id"]: row for row in csv.DictReader(csv_file)}
+            except FileNotFoundError:
+                logging.warning(f"Result file {result_file} doesn't exist. All depositions will be processed.")
+            dep_ids = [deposition_id for deposition_id in dep_ids
+                       if deposition_id not in previous or not _succeeded(previous[deposition_id])]
+            logging.info(f"Retry {action} for {len(dep_ids)} depositions.")
+
+        def request(deposition_id):
+            logging.info(deposition_id)
+            start = time.perf_counter()
+            try:
+                r = send(deposition_id)
+            except requests.RequestException as error:
+                return {"deposition_id": deposition_id, "status_code": "",
+                        "latency": round(time.perf_counter() - start, 3), "error": str(error)}
+            return {"deposition_id": deposition_id, "status_code": r.status_code,
+                    "latency": round(time.perf_counter() - start, 3), "error": "" if r.ok else r.text}
+
+        with self.__get_executor() as executor:
+            results = list(executor.map(request, dep_ids))
+
+        # write results in order of deposition ids (with results of previous run for depositions not retried)
+        rows = {**previous, **{result["deposition_id"]: result for result in results}}
+        with open(result_file, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=["deposition_id", "status_code", "latency", "error"])
+            writer.writeheader()
+            writer.writerows(rows.values())
+        logging.info(f"{sum(_succeeded(result) for result in results)} of {len(results)} requests succeeded, see {result_file}.")
+
+        return results
+
+    # return shared worker pool (not shut down after action) or new worker pool with `concurrency` threads
+    def __get_executor(self):
+        if self.executor is not None:
+            return nullcontext(self.executor)
+        return ThreadPoolExecutor(max_workers=self.concurrency)
+
+    # return md5 checksums of files in bucket of deposition
+    def __get_bucket_checksums(self, bucket_url: str) -> dict:
+        r = self.session.get(bucket_url, params=self.params)
+        if not r.ok:
+            logging.warning(f"Could not list files of bucket {bucket_url}: {r.status_code}. All files will be uploaded.")
+            return {}
+        return {elem["key"]: elem["checksum"].replace("md5:", "") for elem in r.json().get("contents", [])}
+
+    # upload file to bucket of deposition
+    def __put_file(self, bucket_url: str, publication: str) -> requests.Response:
+        with open(publication, "rb") as pub:
+            r = self.session.put(
+                "%s/%s" % (bucket_url, os.path.basename(publication)),
+                data=pub,
+                params=self.params)
+        logging.info(f"Put publication file {publication}: {r.status_code}")
+        return r
+
+    # upload metadata of deposition
+    def __put_metadata(self, deposition_id, data: dict) -> requests.Response:
+        return self.session.put(self.url+'/%s' % deposition_id,
+                                params=self.params, data=json.dumps(data), headers=self.headers)
+
     # create metadata element in xml format
     def __create_metadata_element(self, bundle_info, root):
 
@@ -488,3 +1051,49 @@ class Connection:
         conference_url.text = bundle_info['conference_url']
 
         ET.indent(root, space="    ", level=0)
+
+
+def create_session(concurrency: int = 1, offline: bool = False) -> ZenodoSession:
+    """Returns session for requests to Zenodo API configured by api_* settings in config.yml
+
+    Parameters
+    ----------
+    concurrency : int
+        Maximum number of requests sent at the same time, the connection pool is enlarged accordingly (Default: 1)
+    offline : bool
+        Determines whether requests are refused, because the application runs in offline mode (Default: False)
+
+    Returns
+    -------
+    session : ZenodoSession
+        Session with connection pool and rate limiter
+    """
+
+    rate_limiter = RateLimiter(limit=config.get('api_rate_limit', 100), period=config.get('api_rate_period', 60))
+    return ZenodoSession(pool_size=max(config.get('api_pool_size', 10), concurrency), timeout=tuple(config.get('api_timeout', [10, 300])),
+                         retries=config.get('api_retries', 5), backoff_factor=config.get('api_backoff_factor', 1),
+                         rate_limiter=rate_limiter, offline=offline)
+
+
+# return bundle of bundle structure with its publication files and json metadata (single underscore, as it is used in class bodies)
+def _read_bundle(bundle: str) -> dict:
+    bundle_json, bundle_publications = bundles.get_bundle_files(bundle)
+    with open(bundle_json) as json_file:
+        data = json.load(json_file)
+    return {"name": os.path.basename(bundle), "publications": bundle_publications, "metadata": data, "json": bundle_json}
+
+
+# return size of request body in bytes (single underscore, as it is used in class bodies)
+def _get_body_size(body, position) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (str, bytes)):
+        return len(body.encode("utf-8") if isinstance(body, str) else body)
+    if hasattr(body, "fileno"):
+        return os.fstat(body.fileno()).st_size - (position or 0)
+    return 0
+
+
+# return True if request for deposition succeeded (status code 2xx)
+def _succeeded(result: dict) -> bool:
+    return str(result["status_code"]).startswith("2")
@@ -0,0 +1,181 @@
+"""Module to process many conferences in one process
+
+Creates the bundle structures of several conferences and/or runs actions of
+Zenodo API for them (e.g. for back-catalogue jobs). The conferences are
+processed one after another with a shared worker pool and a shared session
+(connection pool and rate limiter), so that startup and connection costs are
+paid once. Each conference gets its own logging files and metrics.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
+import logging
+import os
+import time
+
+import api
+import bundles
+
+
+class Batch:
+    """Batch of conferences
+
+    Attributes
+    ----------
+    conferences : list
+        Names of conferences of batch (in order of processing)
+    executor : ThreadPoolExecutor
+        Worker pool shared by all conferences
+    session : api.ZenodoSession
+        Session shared by all conferences (None if no action of Zenodo API is run)
+    results : dict
+        Dictionary with conferences as keys and their results (error message, empty if successful) as values
+    durations : dict
+        Dictionary with conferences as keys and their processing time in seconds as values
+    """
+
+    def __init__(self, patterns: list, base: str, jobs: int = 1, concurrency: int = 1, api_actions: bool = False,
+                 offline: bool = False) -> None:
+        """Constructor of Batch class
+
+        Parameters
+        ----------
+        patterns : list
+            Names of conferences or glob patterns (e.g. 'DHd20*'), matched against the conference directories in base
+        base : str
+            Directory containing the conference directories (input_base or output_base)
+        jobs : int
+            Number of threads creating the bundles concurrently (Default: 1)
+        concurrency : int
+            Number of bundles uploaded (or depositions published/deleted) at the same time (Default: 1)
+        api_actions : bool
+            Determines whether a session for Zenodo API is created (Default: False)
+        offline : bool
+            Determines whether requests are refused, because depositions are only read from the response cache (Default: False)
+
+        Raises
+        ------
+        Exception
+            If a pattern matches no conference.
+        """
+
+        self.conferences = get_conferences(patterns, base)
+        self.executor = ThreadPoolExecutor(max_workers=max(jobs, concurrency, 1))
+        self.session = api.create_session(concurrency, offline) if api_actions else None
+        self.results = {}
+        self.durations = {}
+
+    def __enter__(self) -> 'Batch':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts down worker pool and closes session"""
+
+        self.executor.shutdown()
+        if self.session is not None:
+            self.session.close()
+
+    def run(self, bundle_args: dict = None, actions: list = None, api_args: dict = None, keep_going: bool = False) -> dict:
+        """Processes conferences of batch
+
+        For each conference the bundle structure is created (if bundle_args are given)
+        and the actions of Zenodo API are run in the given order.
+
+        Parameters
+        ----------
+        bundle_args : dict
+            Arguments of bundles.Conference and create_bundles, the name of the metadata file
+            may contain the placeholder '{name}' for the conference's name (Default: None, no bundles are created)
+        actions : list
+            Actions of Zenodo API, e.g. ['upload', 'publish'] (Default: None)
+        api_args : dict
+            Arguments of api.Connection (except name, session and executor)
+        keep_going : bool
+            Determines whether the next conference is processed if a conference fails (Default: False)
+
+        Returns
+        -------
+        results : dict
+            Dictionary with conferences as keys and their results (error message, empty if successful) as values
+
+        Raises
+        ------
+        Exception
+            If a conference fails and keep_going isn't set.
+        """
+
+        for name in self.conferences:
+            start = time.perf_counter()
+            try:
+                if bundle_args is not None:
+                    self.__create_bundles(name, dict(bundle_args))
+                if actions:
+                    self.__api_interact(name, actions, dict(api_args or {}))
+                self.results[name] = ""
+            except Exception as error:
+                logging.warning(f"Batch: conference {name} failed: {error}")
+                self.results[name] = str(error) or type(error).__name__
+                if not keep_going:
+                    raise
+            finally:
+                self.durations[name] = time.perf_counter() - start
+                logging.info(f"Batch: conference {name} {'failed' if self.results.get(name) else 'finished'} "
+                             f"in {self.durations[name]:.1f}s")
+        return self.results
+
+    # create bundle structure of conference
+    def __create_bundles(self, name: str, args: dict) -> None:
+        jobs = args.pop("jobs", 1)
+        link_mode = args.pop("link_mode", "copy")
+        args["metadata"] = args["metadata"].format(name=name)
+        conference = bundles.Conference(name, **args)
+        try:
+            conference.create_bundles(jobs=jobs, link_mode=link_mode, executor=self.executor)
+        finally:
+            conference.write_metrics()
+
+    # run actions of zenodo api for conference
+    def __api_interact(self, name: str, actions: list, args: dict) -> None:
+        con = api.Connection(name, session=self.session, executor=self.executor, **args)
+        func = {"upload": con.upload, "publish": con.publish, "update": con.update, "delete": con.delete,
+                "get_metadata": con.get_metadata, "write_identifiers_for_posters": con.write_identifiers_for_posters}
+        try:
+            for action in actions:
+                with con.metrics.timer(action):
+                    func[action]()
+        finally:
+            con.write_metrics()
+
+
+def get_conferences(patterns: list, base: str) -> list:
+    """Returns names of conferences matching names or glob patterns
+
+    Parameters
+    ----------
+    patterns : list
+        Names of conferences or glob patterns (e.g. 'DHd20*')
+    base : str
+        Directory containing the conference directories
+
+    Returns
+    -------
+    conferences : list
+        Names of conferences in order of patterns (sorted for each pattern, without duplicates)
+
+    Raises
+    ------
+    Exception
+        If a pattern matches no conference directory.
+    """
+
+    directories = sorted(entry.name for entry in os.scandir(base) if entry.is_dir())
+    conferences = []
+    for pattern in patterns:
+        matches = fnmatch.filter(directories, pattern)
+        if not matches:
+            raise Exception(f"No conference directory in {base} matches '{pattern}'.")
+        conferences.extend(match for match in matches if match not in conferences)
+    return conferences
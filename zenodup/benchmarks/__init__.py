@@ -0,0 +1,10 @@
+"""Benchmarks for the hot paths of the application
+
+Contains scripts to measure the performance of bundle creation and a local 
+stand-in for Zenodo's deposition API (fake_zenodo) to measure the interaction 
+with Zenodo. The end-to-end benchmark (end_to_end) runs the whole workflow for 
+synthetic conferences (synthetic) of configurable size. Change current working directory to ``zenodup/`` and run a 
+benchmark as module, e.g.:
+
+    python -m benchmarks.assign_files
+"""
@@ -0,0 +1,52 @@
+"""Benchmark for assignment of files by name scheme
+
+Compares the assignment of pdf files to synthetic abstracts by scanning all filenames 
+for each abstract (parsing.get_abstract_file) with the assignment by an index built 
+once for all abstracts (parsing.FilenameIndex).
+"""
+
+import argparse
+import time
+
+from benchmarks import synthetic
+from bundles import parsing
+from bundles import records
+
+
+def scan(abstracts: list, files: list) -> list:
+    """Assignment with a scan of all filenames per abstract"""
+
+    assigned = []
+    for index, abstract in enumerate(abstracts):
+        comparable = parsing.get_comparable_filenames(files)
+        names = parsing.get_bundle_names(abstract)
+        assigned.append(parsing.get_abstract_file(names, comparable, index))
+    return assigned
+
+
+def indexed(abstracts: list, files: list) -> list:
+    """Assignment with an index of all filenames built once"""
+
+    file_index = parsing.FilenameIndex(parsing.get_comparable_filenames(files))
+    return [file_index.get_abstract_file(parsing.get_bundle_names(abstract), index)
+            for index, abstract in enumerate(abstracts)]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark assignment of files by name scheme.")
+    parser.add_argument('-sizes', nargs='+', type=int, default=[100, 500, 1000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        elements, files = synthetic.metadata_elements(size)
+        abstracts = [records.Abstract.from_element(elem) for elem in elements]
+        timings = {}
+        results = {}
+        for func in [scan, indexed]:
+            start = time.perf_counter()
+            results[func.__name__] = func(abstracts, files)
+            timings[func.__name__] = time.perf_counter() - start
+        assert results["scan"] == results["indexed"], "Assignments differ"
+        print(f"{size:>6} abstracts: scan {timings['scan']:.3f}s, index {timings['indexed']:.3f}s "
+              f"(speedup x{timings['scan'] / timings['indexed']:.1f})")
@@ -0,0 +1,92 @@
+"""Benchmark for generation of possible filenames of abstracts
+
+Compares the generation of possible filenames by replacing each character one
+after another for each title and creator (as before in parsing.get_bundle_names)
+with the generation by a single translation table and cached creator prefixes
+(parsing.get_candidate_names), for the first run of a conference and for a
+repeated run (e.g. the incremental run of create_bundles or a batch). The
+possible filenames of both are checked to be the same (each name at its last
+position), so that the assignments of the filename index are the same.
+"""
+
+import argparse
+import gc
+import time
+
+from benchmarks import synthetic
+from bundles import parsing
+from bundles import records
+
+
+def ascii_rename(name: str) -> str:
+    """Ascii representation of string by replacing each character one after another"""
+
+    elements_to_be_replaced = [".", "-", ":", ",", "?", "!", " ", "(", ")", "&", "@"]
+    name = name.replace("ß", "ss")
+    name = name.replace("\"", "_em_")
+    name = name.replace("\'", "_em_")
+    for char in elements_to_be_replaced:
+        name = name.replace(char, "_")
+    try:
+        name.encode("ascii")
+    except UnicodeEncodeError:
+        name = ''.join([i if ord(i) < 128 else '_' for i in name])
+    return name
+
+
+def replaced(abstracts: list) -> list:
+    """Possible filenames generated for each title and creator"""
+
+    names = []
+    for abstract in abstracts:
+        creator_names = [[ascii_rename(elem.strip()) for elem in creator.name.split(",")] for creator in abstract.creators]
+        title = ascii_rename(abstract.raw_title)
+        prefixes = [creator[0].upper() + '_' + creator[1] + '_' for creator in creator_names]
+        possible_names = [prefix + title for prefix in prefixes]
+        if title.find("_em_") != -1:
+            possible_names.extend(prefix + title.replace("_em_", "_") for prefix in prefixes)
+        if title.find("ss") != -1:
+            possible_names.extend(prefix + title.replace("ss", "_") for prefix in prefixes)
+        possible_names.extend(prefix + '_' + title for prefix in prefixes)
+        names.append(possible_names)
+    return names
+
+
+def translated(abstracts: list) -> list:
+    """Possible filenames generated by translation table and cached creator prefixes"""
+
+    return [list(names) for abstract in abstracts for names in parsing.get_bundle_names(abstract).values()]
+
+
+def timed(func, abstracts: list):
+    """Returns result and duration of function, garbage collection is disabled while timing (like timeit)"""
+
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func(abstracts)
+        return result, time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark generation of possible filenames of abstracts.")
+    parser.add_argument('-sizes', nargs='+', type=int, default=[10000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        elements, _ = synthetic.metadata_elements(size)
+        abstracts = [records.Abstract.from_element(elem) for elem in elements]
+        timings = {}
+
+        expected, timings["replaced"] = timed(replaced, abstracts)
+        expected = [list(reversed(dict.fromkeys(reversed(possible_names)))) for possible_names in expected]
+        parsing.get_candidate_names.cache_clear()
+        for run in ["first", "repeated"]:
+            names, timings[run] = timed(translated, abstracts)
+            assert names == expected, "Possible filenames differ"
+        print(f"{size:>7} titles: replaced {timings['replaced']:.3f}s, translated {timings['first']:.3f}s "
+              f"(speedup x{timings['replaced'] / timings['first']:.1f}), repeated run {timings['repeated']:.3f}s "
+              f"(speedup x{timings['replaced'] / timings['repeated']:.1f})")
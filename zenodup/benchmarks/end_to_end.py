@@ -0,0 +1,146 @@
+"""End-to-end benchmark of bundle creation and interaction with Zenodo API
+
+Generates synthetic conferences (metadata file, pdf and TEI files) of the given
+sizes in a temporary working directory and times the phases of the workflow:
+reading the conference (Conference.__init__), assigning the files and verifying
+the assignments with the titles of the TEI files, creating the
+bundles (first and incremental run), creating the assignments csv file, the
+API actions upload, publish and get_metadata against a local stand-in for Zenodo
+(see fake_zenodo) and the upload directly from the input directory. The timings
+are written to a json file, which can be compared with the results of a previous
+run (e.g. of the last release):
+
+    python -m benchmarks.end_to_end -sizes 1000 10000 -output support/benchmarks/release.json
+    python -m benchmarks.end_to_end -sizes 1000 10000 -baseline support/benchmarks/release.json
+
+The results are written to ``support/benchmarks/end_to_end.json`` by default.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import api
+import bundles
+from benchmarks import synthetic
+from benchmarks.fake_zenodo import FakeZenodo
+
+# working directories of configuration, redirected to temporary directory
+DIRECTORIES = {"input_base": "INPUT", "output_base": "OUTPUT", "depositions_dir": "support/depositions/",
+               "logging_dir": "support/logging/", "assignments_dir": "support/assignments/",
+               "packages_dir": "support/packages/", "manifests_dir": "support/manifests/",
+               "journals_dir": "support/journals/", "cache_dir": "support/cache/",
+               "metrics_dir": "support/metrics/"}
+
+
+def use_directory(base: str) -> None:
+    """Redirects working directories of bundles and api to base directory"""
+
+    for key, path in DIRECTORIES.items():
+        os.makedirs(os.path.join(base, path), exist_ok=True)
+        for config in [bundles.config, api.config]:
+            config[key] = os.path.join(base, path)
+
+
+def timed(timings: dict, phase: str, func, *args, **kwargs):
+    """Calls function and records its duration in seconds as phase of timings"""
+
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[phase] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run(size: int, args: argparse.Namespace) -> dict:
+    """Runs workflow for synthetic conference of given size, returns timings of phases"""
+
+    name = f"synthetic_{size}"
+    timings = {}
+    timed(timings, "generate", synthetic.write_conference, os.path.join(bundles.config["input_base"], name), size,
+          seed=args.seed)
+
+    # bundle creation
+    conference = timed(timings, "init", bundles.Conference, name, "metadata.xml", False, "pdf", "xml")
+    assignments = timed(timings, "assign_files", conference._Conference__assign_files)
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        timed(timings, "verify_assignments", conference._Conference__verify_assignments, assignments, pool)
+    timed(timings, "create_bundles", conference.create_bundles, jobs=args.jobs, link_mode=args.link_mode)
+    timed(timings, "create_bundles_unchanged", conference.create_bundles, jobs=args.jobs, link_mode=args.link_mode)
+    timed(timings, "create_csv", conference._Conference__create_csv, assignments)
+
+    # interaction with zenodo api
+    if args.api:
+        with FakeZenodo(latency=args.latency, seed=args.seed) as zenodo:
+            con = api.Connection(name, "token", False, concurrency=args.concurrency, bulk=True, base_url=zenodo.url)
+            timed(timings, "upload", con.upload)
+            timed(timings, "upload_unchanged", con.upload)
+            timed(timings, "publish", con.publish)
+            timed(timings, "get_metadata", con.get_metadata)
+
+        # upload directly from input directory (to another server, drafts of previous upload aren't reused)
+        with FakeZenodo(latency=args.latency, seed=args.seed) as zenodo:
+            con = api.Connection(name, "token", False, concurrency=args.concurrency, base_url=zenodo.url)
+            timed(timings, "upload_from_input", con.upload, conference)
+    return timings
+
+
+def compare(results: dict, baseline_file: str, tolerance: float) -> bool:
+    """Prints timings relative to baseline, returns False if a phase is slower than tolerated"""
+
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {run["size"]: run["timings"] for run in json.load(f)["runs"]}
+    passed = True
+    for current in results["runs"]:
+        for phase, duration in current["timings"].items():
+            previous = baseline.get(current["size"], {}).get(phase)
+            if not previous:
+                continue
+            ratio = duration / previous
+            regression = ratio > tolerance and duration - previous > 0.05
+            passed = passed and not regression
+            print(f"{current['size']:>6} {phase:<26} {previous:>9.3f}s -> {duration:>9.3f}s (x{ratio:.2f})"
+                  + (" REGRESSION" if regression else ""))
+    return passed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark bundle creation and interaction with Zenodo API end-to-end.")
+    parser.add_argument('-sizes', nargs='+', type=int, default=[1000])
+    parser.add_argument('-seed', type=int, default=0)
+    parser.add_argument('-jobs', type=int, default=4)
+    parser.add_argument('-link-mode', choices=bundles.LINK_MODES, default='copy')
+    parser.add_argument('-api', nargs='?', type=bool, default=True, const=True,
+                        help="Benchmark API actions against local stand-in for Zenodo (disable with '-api \"\"')")
+    parser.add_argument('-concurrency', type=int, default=8)
+    parser.add_argument('-latency', type=float, default=0.005, help="Latency of local stand-in for Zenodo in seconds")
+    parser.add_argument('-output', type=str, default=os.path.join("support", "benchmarks", "end_to_end.json"))
+    parser.add_argument('-baseline', type=str, default=None, help="Results of previous run to compare with")
+    parser.add_argument('-tolerance', type=float, default=1.2, help="Tolerated slowdown compared to baseline")
+    args = parser.parse_args()
+
+    # requests to local stand-in are only limited by its rate limit headers
+    api.config['api_rate_limit'] = 1000000
+
+    results = {"python": platform.python_version(), "platform": platform.platform(),
+               "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "arguments": vars(args), "runs": []}
+    with tempfile.TemporaryDirectory() as base:
+        use_directory(base)
+        for size in args.sizes:
+            timings = run(size, args)
+            results["runs"].append({"size": size, "timings": timings})
+            print(f"{size:>6} abstracts: " + ", ".join(f"{phase} {duration:.3f}s" for phase, duration in timings.items()))
+
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results have been written to {args.output}.")
+
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,357 @@
+"""Local stand-in for Zenodo's deposition API
+
+Serves the parts of Zenodo's REST API used by api.Connection (create,
+update, publish, edit, delete and list depositions, list deposition files,
+upload files to buckets and list buckets), so that uploads can be measured
+and tested without the Zenodo sandbox. Latency, rate limit and errors
+(429, 5xx) can be configured. Uploaded files are kept in memory or written
+to a directory.
+
+The server can be started in a benchmark or test, e.g. with the pytest fixture
+``zenodo`` (see ``conftest.py``):
+
+    def test_upload(zenodo):
+        con = api.Connection("smoke", "token", False, base_url=zenodo.url)
+
+or as standalone benchmark target (run from ``zenodup/``):
+
+    python -m benchmarks.fake_zenodo -port 5000 -latency 0.05 -rate-limit 100
+    python zenodup.py api upload [CONFERENCE] token -base-url http://127.0.0.1:5000
+"""
+
+import argparse
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlparse
+
+DEPOSITIONS = "/api/deposit/depositions"
+FILES = "/api/files"
+
+
+class FakeZenodo:
+    """Local stand-in for Zenodo's deposition API
+
+    Attributes
+    ----------
+    url : str
+        Base url of server (e.g. 'http://127.0.0.1:5000')
+    depositions : dict
+        Dictionary with deposition ids as keys and depositions as values
+    buckets : dict
+        Dictionary with bucket ids as keys and dictionaries of uploaded files (file name: file entry) as values
+    stats : dict
+        Number of requests per status code
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0, rate_limit: int = None,
+                 rate_period: float = 60, error_rate: float = 0, throttle_rate: float = 0, store_dir: str = None,
+                 token: str = None, seed: int = 0) -> None:
+        """Constructor of FakeZenodo class
+
+        Parameters
+        ----------
+        host : str
+            Host of server (Default: '127.0.0.1')
+        port : int
+            Port of server (Default: 0, i.e. any free port)
+        latency : float
+            Delay of each response in seconds (Default: 0)
+        rate_limit : int
+            Maximum number of requests per period, further requests are rejected with status 429 (Default: None, no limit)
+        rate_period : float
+            Period of rate limit in seconds (Default: 60)
+        error_rate : float
+            Probability that a request fails with status 503 (Default: 0)
+        throttle_rate : float
+            Probability that a request is rejected with status 429 regardless of rate limit (Default: 0)
+        store_dir : str
+            Directory for uploaded files (Default: None, files are kept in memory)
+        token : str
+            Access token required for requests (Default: None, any token is accepted)
+        seed : int
+            Seed for injected errors (Default: 0)
+        """
+
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.store_dir = store_dir
+        self.token = token
+        self.depositions = {}
+        self.buckets = {}
+        self.stats = {}
+        self.__random = random.Random(seed)
+        self.__next_id = 1
+        self.__window = (0.0, 0)
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer((host, port), _handler(self))
+        self.__server.daemon_threads = True
+        self.url = f"http://{host}:{self.__server.server_address[1]}"
+        self.__thread = None
+
+    def __enter__(self) -> 'FakeZenodo':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Starts server in background thread"""
+
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+    def serve_forever(self) -> None:
+        """Runs server in current thread"""
+
+        self.__server.serve_forever()
+
+    def stop(self) -> None:
+        """Stops server"""
+
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def handle(self, method: str, path: str, query: dict, headers, body: bytes) -> tuple:
+        """Returns response for request
+
+        Parameters
+        ----------
+        method : str
+            HTTP method
+        path : str
+            Path of request url
+        query : dict
+            Query parameters of request url
+        headers :
+            Request headers
+        body : bytes
+            Request body
+
+        Returns
+        -------
+        status_code, data, response_headers : tuple
+            Status code, json data (None for empty response) and headers of response
+        """
+
+        if self.latency:
+            time.sleep(self.latency)
+        with self.__lock:
+            rate_headers = self.__count_request()
+            if rate_headers.get("X-RateLimit-Remaining") == "-1":
+                rate_headers.update({"X-RateLimit-Remaining": "0"})
+                return self.__count(429, {"status": 429, "message": "Too many requests."}, rate_headers)
+            if self.__random.random() < self.throttle_rate:
+                rate_headers.update({"Retry-After": "1"})
+                return self.__count(429, {"status": 429, "message": "Too many requests."}, rate_headers)
+            if self.__random.random() < self.error_rate:
+                return self.__count(503, {"status": 503, "message": "Service unavailable."}, rate_headers)
+            if self.token and query.get("access_token") != self.token:
+                return self.__count(401, {"status": 401, "message": "Invalid access token."}, rate_headers)
+            status_code, data, response_headers = self.__route(method, path.rstrip("/"), query, headers, body)
+            response_headers.update(rate_headers)
+            return self.__count(status_code, data, response_headers)
+
+    # dispatch request to deposition or bucket resource
+    def __route(self, method: str, path: str, query: dict, headers, body: bytes) -> tuple:
+        parts = path.split("/")
+        if path == DEPOSITIONS:
+            if method == "POST":
+                return self.__create()
+            if method == "GET":
+                return self.__list(query)
+        elif path.startswith(DEPOSITIONS + "/"):
+            deposition = self.depositions.get(parts[4])
+            if deposition is None:
+                return 404, {"status": 404, "message": "PID does not exist."}, {}
+            if len(parts) == 5:
+                if method == "GET":
+                    return self.__get(deposition, headers)
+                if method == "PUT":
+                    return self.__update(deposition, body)
+                if method == "DELETE":
+                    return self.__delete(deposition)
+            elif len(parts) == 6 and parts[5] == "files" and method == "GET":
+                return 200, self.__files(deposition), {}
+            elif len(parts) == 7 and parts[5] == "actions" and method == "POST":
+                if parts[6] == "publish":
+                    return self.__publish(deposition)
+                if parts[6] == "edit":
+                    deposition["state"] = "inprogress"
+                    return 201, self.__with_files(deposition), {}
+        elif path.startswith(FILES + "/") and parts[3] in self.buckets:
+            if len(parts) == 4 and method == "GET":
+                return 200, {"contents": [{key: value for key, value in entry.items() if key != "content"}
+                                          for entry in self.buckets[parts[3]].values()]}, {}
+            if len(parts) == 5 and method == "PUT":
+                return self.__put_file(parts[3], parts[4], body)
+        return 404, {"status": 404, "message": "Not found."}, {}
+
+    # create empty deposition with bucket
+    def __create(self) -> tuple:
+        deposition_id = str(self.__next_id)
+        self.__next_id += 1
+        bucket = hashlib.md5(deposition_id.encode("utf-8")).hexdigest()
+        self.buckets[bucket] = {}
+        deposition = {"id": int(deposition_id), "conceptrecid": deposition_id, "title": "", "metadata": {},
+                      "state": "unsubmitted", "submitted": False, "files": [], "bucket": bucket,
+                      "links": {"self": f"{self.url}{DEPOSITIONS}/{deposition_id}", "bucket": f"{self.url}{FILES}/{bucket}"}}
+        self.depositions[deposition_id] = deposition
+        return 201, self.__with_files(deposition), {}
+
+    # list depositions (query matches text of deposition's json)
+    def __list(self, query: dict) -> tuple:
+        size = int(query.get("size", 10))
+        page = int(query.get("page", 1))
+        depositions = [self.__with_files(deposition) for deposition in self.depositions.values()]
+        if query.get("q"):
+            words = [word.strip('"').split(":")[-1].strip('"') for word in query["q"].split()]
+            depositions = [deposition for deposition in depositions
+                           if all(word in json.dumps(deposition, ensure_ascii=False) for word in words)]
+        return 200, depositions[(page - 1) * size:page * size], {}
+
+    # get deposition, conditional requests are answered with 304 if deposition is unchanged
+    def __get(self, deposition: dict, headers) -> tuple:
+        data = self.__with_files(deposition)
+        etag = '"' + hashlib.md5(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+        if headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, data, {"ETag": etag}
+
+    # update metadata of deposition
+    def __update(self, deposition: dict, body: bytes) -> tuple:
+        if deposition["state"] == "done":
+            return 400, {"status": 400, "message": "Deposition is published, use edit action first."}, {}
+        try:
+            metadata = json.loads(body)["metadata"]
+        except (ValueError, KeyError, TypeError):
+            return 400, {"status": 400, "message": "Validation error."}, {}
+        deposition["metadata"] = metadata
+        deposition["title"] = metadata.get("title", "")
+        return 200, self.__with_files(deposition), {}
+
+    # delete draft
+    def __delete(self, deposition: dict) -> tuple:
+        if deposition["submitted"]:
+            return 403, {"status": 403, "message": "Published depositions can't be deleted."}, {}
+        del self.depositions[str(deposition["id"])]
+        del self.buckets[deposition["bucket"]]
+        return 204, None, {}
+
+    # publish deposition (registers dois)
+    def __publish(self, deposition: dict) -> tuple:
+        if not deposition["metadata"] or not self.buckets[deposition["bucket"]]:
+            return 400, {"status": 400, "message": "Validation error: missing metadata or files."}, {}
+        deposition.update({"state": "done", "submitted": True,
+                           "doi": f"10.5072/zenodo.{deposition['id']}",
+                           "conceptdoi": f"10.5072/zenodo.{deposition['conceptrecid']}"})
+        return 202, self.__with_files(deposition), {}
+
+    # store uploaded file
+    def __put_file(self, bucket: str, key: str, body: bytes) -> tuple:
+        entry = {"key": key, "size": len(body), "checksum": "md5:" + hashlib.md5(body).hexdigest()}
+        if self.store_dir:
+            os.makedirs(os.path.join(self.store_dir, bucket), exist_ok=True)
+            with open(os.path.join(self.store_dir, bucket, key), "wb") as f:
+                f.write(body)
+        else:
+            entry = dict(entry, content=body)
+        self.buckets[bucket][key] = entry
+        return 201, {k: v for k, v in entry.items() if k != "content"}, {}
+
+    # return files of deposition
+    def __files(self, deposition: dict) -> list:
+        return [{"id": f"{deposition['bucket']}/{entry['key']}", "filename": entry["key"], "filesize": entry["size"],
+                 "checksum": entry["checksum"].replace("md5:", "")}
+                for entry in self.buckets[deposition["bucket"]].values()]
+
+    # return deposition with its files
+    def __with_files(self, deposition: dict) -> dict:
+        data = {key: value for key, value in deposition.items() if key != "bucket"}
+        data["files"] = self.__files(deposition)
+        return data
+
+    # count request in current rate limit window, return rate limit headers
+    def __count_request(self) -> dict:
+        if not self.rate_limit:
+            return {}
+        now = time.time()
+        start, count = self.__window
+        if now - start >= self.rate_period:
+            start, count = now, 0
+        count += 1
+        self.__window = (start, count)
+        reset = int(start + self.rate_period) + 1
+        headers = {"X-RateLimit-Limit": str(self.rate_limit), "X-RateLimit-Reset": str(reset),
+                   "X-RateLimit-Remaining": str(self.rate_limit - count)}
+        if count > self.rate_limit:
+            headers.update({"X-RateLimit-Remaining": "-1", "Retry-After": str(max(reset - int(now), 1))})
+        return headers
+
+    # count response by status code
+    def __count(self, status_code: int, data, headers: dict) -> tuple:
+        self.stats[status_code] = self.stats.get(status_code, 0) + 1
+        return status_code, data, headers
+
+
+# return request handler class for server
+def _handler(server: FakeZenodo):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = "HTTP/1.1"
+        # headers and body are written separately, with Nagle's algorithm each response of a kept-alive
+        # connection would wait for the delayed ACK of the client (about 40 ms)
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def __respond(self) -> None:
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status_code, data, headers = server.handle(self.command, unquote(url.path), query, self.headers, body)
+            payload = json.dumps(data).encode("utf-8") if data is not None else b""
+            self.send_response(status_code)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            if payload:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = __respond
+
+    return Handler
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Run local stand-in for Zenodo's deposition API.")
+    parser.add_argument('-host', type=str, default="127.0.0.1")
+    parser.add_argument('-port', type=int, default=5000)
+    parser.add_argument('-latency', type=float, default=0)
+    parser.add_argument('-rate-limit', type=int, default=None)
+    parser.add_argument('-rate-period', type=float, default=60)
+    parser.add_argument('-error-rate', type=float, default=0)
+    parser.add_argument('-throttle-rate', type=float, default=0)
+    parser.add_argument('-store-dir', type=str, default=None)
+    parser.add_argument('-token', type=str, default=None)
+    args = parser.parse_args()
+
+    zenodo = FakeZenodo(**vars(args))
+    print(f"Fake Zenodo API running on {zenodo.url} (stop with Ctrl+C)")
+    try:
+        zenodo.serve_forever()
+    except KeyboardInterrupt:
+        zenodo.stop()
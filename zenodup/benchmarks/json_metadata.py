@@ -0,0 +1,81 @@
+"""Benchmark for creation of json metadata
+
+Compares the creation of json metadata from metadata elements by querying the 
+element tree for each field (like before the introduction of records.Abstract) 
+with the creation from abstracts parsed and normalized once.
+"""
+
+import argparse
+import logging
+import time
+
+import bundles
+from benchmarks import synthetic
+from bundles import records
+
+
+def element_json(pub) -> dict:
+    """Json metadata by querying the element tree for each field"""
+
+    upload_type = pub.find("upload_type").text.replace("\n", "")
+    return {"metadata": {"upload_type": pub.find("upload_type").text.replace("\n", ""),
+                         "publication_type" if pub.find("upload_type").text.replace("\n", "") == "publication" else "dump_publicationtype":
+                             pub.find("publication_type").text if upload_type == "publication" else None,
+                         "publication_date": pub.find("publication_date").text.replace("\n", ""),
+                         "title": ' '.join(pub.find("title").text.replace("\n", "").split()),
+                         "creators": [{"name": creator.find("name").text.replace("\n", ""),
+                                       "affiliation": ' '.join(creator.find("affiliation").text.replace("\n", "").split())}
+                                      for creator in pub.findall("creators/creator")],
+                         "description": ' '.join(pub.find("description").text.replace("\n", "").split()),
+                         "access_right": pub.find("access_right").text.replace("\n", ""),
+                         "license": pub.find("license").text.replace("\n", ""),
+                         "doi": "",
+                         "keywords": [' '.join(elem.replace("\"", "").split()) for elem in pub.find("keywords").text.replace("\n", "").split(", ")],
+                         "related_identifiers": [{"relation": rel.find("relation").text.replace("\n", ""),
+                                                  "identifier": rel.find("identifier").text.replace("\n", ""),
+                                                  "resource_type": rel.find("resource_type").text.replace("\n", "")}
+                                                 for rel in pub.findall("related_identifiers/related_identifier")],
+                         "contributors": [{"name": contributor.find("name").text.replace("\n", ""),
+                                           "affiliation": ' '.join(contributor.find("affiliation").text.replace("\n", "").split()),
+                                           "type": contributor.find("type").text.replace("\n", "")}
+                                          for contributor in pub.findall("contributors/contributor")],
+                         "communities": [{"identifier": pub.find("communities/identifier").text}],
+                         "conference_title": ' '.join(pub.find("conference_title").text.replace("\n", "").split()),
+                         "conference_acronym": pub.find("conference_acronym").text.replace("\n", ""),
+                         "conference_dates": pub.find("conference_dates").text.replace("\n", ""),
+                         "conference_place": pub.find("conference_place").text.replace("\n", ""),
+                         "conference_url": pub.find("conference_url").text.replace("\n", "")}}
+
+
+def elements(metadata: list, repeat: int) -> None:
+    """Json metadata of metadata elements (queried on each creation)"""
+
+    for _ in range(repeat):
+        for elem in metadata:
+            element_json(elem)
+
+
+def abstracts(metadata: list, repeat: int) -> None:
+    """Json metadata of abstracts (parsed once)"""
+
+    parsed = [records.Abstract.from_element(elem) for elem in metadata]
+    for _ in range(repeat):
+        for abstract in parsed:
+            bundles.get_json_metadata(abstract)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark creation of json metadata.")
+    parser.add_argument('-size', type=int, default=5000)
+    parser.add_argument('-repeat', type=int, default=3,
+                        help="Number of times the metadata of each abstract is used (json, names, csv)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    metadata, _ = synthetic.metadata_elements(args.size)
+    for func in [elements, abstracts]:
+        start = time.perf_counter()
+        func(metadata, args.repeat)
+        duration = time.perf_counter() - start
+        print(f"{func.__name__:>10}: {duration:.3f}s ({duration / (args.size * args.repeat) * 1e6:.1f} µs per abstract)")
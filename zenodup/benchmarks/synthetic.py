@@ -0,0 +1,164 @@
+"""Synthetic conference data for benchmarks
+
+Generates metadata elements in the format of the conferences' metadata files
+and the corresponding filenames of the conference tool exports. Complete
+conference directories (metadata file, pdf and TEI files) can be written
+for end-to-end benchmarks.
+"""
+
+import os
+import random
+from xml.etree import ElementTree as ET
+
+WORDS = ["Digitale", "Edition", "Spielräume", "Modellierung", "Interpretation", "Korpus", "Annotation",
+         "Netzwerkanalyse", "Forschungsdaten", "Textanalyse", "Maschinelles", "Lernen", "Theater", "Briefe",
+         "\"Distant Reading\"", "Straße", "Überlieferung", "Öffentlichkeit", "Zeitschriften-Korpora"]
+NAMES = ["Müller, Anna", "Schöch, Christof", "Weiß, Jürgen", "Helling, Patrick", "O'Neill, Sean", "Roeder, Torsten",
+         "Çelik, Ayşe", "Doe-Smith, Jane", "Åström, Lars", "Grünewald, Mareike", "Schulze, Karl \"Kalle\""]
+SUBCATEGORIES = ["Vortrag", "Posterpräsentation", "Panel", "Workshop"]
+TEI = "http://www.tei-c.org/ns/1.0"
+ET.register_namespace('', TEI)
+
+
+def metadata_elements(size: int, seed: int = 0):
+    """Returns metadata elements and pdf filenames of a synthetic conference
+
+    Parameters
+    ----------
+    size : int
+        Number of abstracts
+    seed : int
+        Seed of random generator (same seed, same conference)
+
+    Returns
+    -------
+    elements : list
+        List of metadata elements
+    files : list
+        Sorted list of pdf filenames ('NNN_final-NAME_First_Title.pdf')
+    """
+
+    rnd = random.Random(seed)
+    elements, files = [], []
+    for index in range(size):
+        title = f"Studie {index}: " + ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 8)))
+        creators = rnd.sample(NAMES, rnd.randint(1, 3))
+        elements.append(metadata_element(title, creators, rnd))
+
+        files.append(filename(index, title, creators) + ".pdf")
+    files.sort()
+    return elements, files
+
+
+def filename(index: int, title: str, creators: list) -> str:
+    """Returns filename (without extension) of abstract like in the conference tool exports
+
+    Filenames are truncated after 64 characters like in the conference tool exports.
+    """
+
+    last_name, first_name = creators[0].split(", ")
+    name = f"{last_name.upper()}_{first_name}_{title}"
+    return f"{index + 100:03d}_final-" + ascii_name(name)[:64]
+
+
+def write_conference(directory: str, size: int, seed: int = 0, metadata: str = "metadata.xml") -> None:
+    """Writes synthetic conference directory
+
+    The conference directory contains the metadata file, a directory 'pdf' with 
+    (minimal) pdf files and a directory 'xml' with TEI files for all abstracts.
+
+    Parameters
+    ----------
+    directory : str
+        Path to conference directory
+    size : int
+        Number of abstracts
+    seed : int
+        Seed of random generator (same seed, same conference)
+    metadata : str
+        Name of metadata file (Default: 'metadata.xml')
+    """
+
+    rnd = random.Random(seed)
+    elements, _ = metadata_elements(size, seed)
+    os.makedirs(os.path.join(directory, "pdf"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "xml"), exist_ok=True)
+
+    root = ET.Element("root")
+    for index, elem in enumerate(elements):
+        root.append(elem)
+        title = elem.find("title").text
+        creators = [creator.text for creator in elem.findall("creators/creator/name")]
+        name = filename(index, title, creators)
+        with open(os.path.join(directory, "pdf", name + ".pdf"), "wb") as f:
+            f.write(b"%PDF-1.4\n% " + title.encode("utf-8") + b"\n%%EOF\n")
+        ET.ElementTree(tei_element(name, title, creators, rnd)).write(os.path.join(directory, "xml", name + ".xml"),
+                                                                      encoding="utf-8", xml_declaration=True)
+    ET.indent(root, space="   ")
+    ET.ElementTree(root).write(os.path.join(directory, metadata), encoding="us-ascii")
+
+
+def tei_element(xml_id: str, title: str, creators: list, rnd: random.Random) -> ET.Element:
+    """Returns TEI element of abstract with xml:id, title, authors and keywords"""
+
+    tei = ET.Element(f"{{{TEI}}}TEI", {"{http://www.w3.org/XML/1998/namespace}id": xml_id})
+    header = ET.SubElement(tei, f"{{{TEI}}}teiHeader")
+    title_stmt = ET.SubElement(ET.SubElement(header, f"{{{TEI}}}fileDesc"), f"{{{TEI}}}titleStmt")
+    full_title = ET.SubElement(title_stmt, f"{{{TEI}}}title", type="full")
+    ET.SubElement(full_title, f"{{{TEI}}}title", type="main").text = title
+    ET.SubElement(full_title, f"{{{TEI}}}title", type="sub")
+    for name in creators:
+        last_name, first_name = name.split(", ")
+        pers_name = ET.SubElement(ET.SubElement(title_stmt, f"{{{TEI}}}author"), f"{{{TEI}}}persName")
+        ET.SubElement(pers_name, f"{{{TEI}}}surname").text = last_name
+        ET.SubElement(pers_name, f"{{{TEI}}}forename").text = first_name
+    text_class = ET.SubElement(ET.SubElement(header, f"{{{TEI}}}profileDesc"), f"{{{TEI}}}textClass")
+    for n, terms in [("category", ["Paper"]), ("subcategory", [rnd.choice(SUBCATEGORIES)]), ("keywords", rnd.sample(WORDS, 3))]:
+        keywords = ET.SubElement(text_class, f"{{{TEI}}}keywords", n=n, scheme="ConfTool")
+        for term in terms:
+            ET.SubElement(keywords, f"{{{TEI}}}term").text = term
+    body = ET.SubElement(ET.SubElement(tei, f"{{{TEI}}}text"), f"{{{TEI}}}body")
+    for _ in range(5):
+        ET.SubElement(body, f"{{{TEI}}}p").text = ' '.join(rnd.choice(WORDS) for _ in range(80))
+    return tei
+
+
+def metadata_element(title: str, creators: list, rnd: random.Random) -> ET.Element:
+    """Returns metadata element of abstract with given title and creators"""
+
+    elem = ET.Element("metadata")
+    for tag, text in [("upload_type", "publication"), ("publication_type", "conferencepaper"),
+                      ("publication_date", "2020-02-20"), ("title", title)]:
+        ET.SubElement(elem, tag).text = text
+    creators_elem = ET.SubElement(elem, "creators")
+    for name in creators:
+        creator = ET.SubElement(creators_elem, "creator")
+        ET.SubElement(creator, "name").text = name
+        ET.SubElement(creator, "affiliation").text = "Universität zu Köln,\n   Deutschland"
+    for tag, text in [("description", "A single abstract from the\n DHd-2020 Book of Abstracts."),
+                      ("access_right", "open"), ("license", "cc-by"), ("doi", None),
+                      ("keywords", ", ".join(["DHd2020"] + rnd.sample(WORDS, 3)))]:
+        ET.SubElement(elem, tag).text = text
+    contributors = ET.SubElement(elem, "contributors")
+    contributor = ET.SubElement(contributors, "contributor")
+    for tag, text in [("name", "Helling, Patrick"), ("affiliation", "DHd e.V."), ("type", "Editor")]:
+        ET.SubElement(contributor, tag).text = text
+    related_identifiers = ET.SubElement(elem, "related_identifiers")
+    related_identifier = ET.SubElement(related_identifiers, "related_identifier")
+    for tag, text in [("relation", "isPartOf"), ("identifier", "10.5281/zenodo.3666690"),
+                      ("resource_type", "publication-book")]:
+        ET.SubElement(related_identifier, tag).text = text
+    ET.SubElement(ET.SubElement(elem, "communities"), "identifier").text = "dhd"
+    for tag, text in [("conference_title", "DHd 2020 Spielräume"), ("conference_acronym", "DHd 2020"),
+                      ("conference_dates", "02.03.2020-06.03.2020"), ("conference_place", "Paderborn"),
+                      ("conference_url", "https://dhd2020.dig-hum.de/")]:
+        ET.SubElement(elem, tag).text = text
+    return elem
+
+
+def ascii_name(name: str) -> str:
+    """Returns filename representation of name like in the conference tool exports"""
+
+    for char in [".", "-", ":", ",", "?", "!", " ", "(", ")", "&", "@", "'", "\""]:
+        name = name.replace(char, "_")
+    return ''.join([c if ord(c) < 128 else '_' for c in name.replace("ß", "ss")])
@@ -0,0 +1,82 @@
+"""Benchmark for matching poster titles with abstract titles
+
+Compares the lookup of each poster title in the list of abstract titles without
+spaces (as before in write_identifiers_for_posters) with the matching by an index
+of normalized titles (bundles.titles.TitleIndex). The poster titles are the
+synthetic abstract titles with typographic variations (quotes, dashes, case,
+decomposed umlauts, hyphenation, additions).
+"""
+
+import argparse
+import random
+import time
+import unicodedata
+
+from benchmarks import synthetic
+from bundles import records
+from bundles import titles
+
+
+def vary(title: str, rnd: random.Random) -> str:
+    """Returns title with a random typographic variation"""
+
+    variation = rnd.randrange(6)
+    if variation == 0:
+        return title
+    if variation == 1:
+        return title.replace('"', "„", 1).replace('"', "“", 1)
+    if variation == 2:
+        return unicodedata.normalize("NFD", title).upper()
+    if variation == 3:
+        return title.replace(": ", " – ")
+    if variation == 4:
+        middle = title.find(" ", len(title) // 2)
+        return title[:middle] + "-\n" + title[middle + 1:] if middle != -1 else title
+    return title + " (Poster)"
+
+
+def scan(abstract_titles: list, poster_titles: list) -> list:
+    """Lookup of each poster title in list of abstract titles without spaces"""
+
+    stripped = [title.replace(" ", "") for title in abstract_titles]
+    matches = []
+    for title in poster_titles:
+        name = title.replace(" ", "").replace("\n", "")
+        matches.append(stripped.index(name) if name in stripped else None)
+    return matches
+
+
+def indexed(abstract_titles: list, poster_titles: list, threshold: float = 0.9) -> list:
+    """Matching by index of normalized titles"""
+
+    title_index = titles.TitleIndex(abstract_titles)
+    return [title_index.match(title, min_score=threshold)["position"] for title in poster_titles]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark matching of poster titles with abstract titles.")
+    parser.add_argument('-sizes', nargs='+', type=int, default=[1000, 5000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        elements, _ = synthetic.metadata_elements(size)
+        abstract_titles = [records.Abstract.from_element(elem).title for elem in elements]
+        rnd = random.Random(size)
+        # expected match is the first abstract with the title (like in lookups of a list)
+        first = {}
+        for position, title in enumerate(abstract_titles):
+            first.setdefault(title, position)
+        posters = [(first[title], vary(title, rnd)) for title in abstract_titles]
+        rnd.shuffle(posters)
+        poster_titles = [title for _, title in posters]
+
+        timings = {}
+        correct = {}
+        for func in [scan, indexed]:
+            start = time.perf_counter()
+            matches = func(abstract_titles, poster_titles)
+            timings[func.__name__] = time.perf_counter() - start
+            correct[func.__name__] = sum(1 for match, (expected, _) in zip(matches, posters) if match == expected)
+        print(f"{size:>6} posters: scan {timings['scan']:.3f}s ({correct['scan']} matched), "
+              f"index {timings['indexed']:.3f}s ({correct['indexed']} matched)")
@@ -1,20 +1,34 @@
 """Package to handle creation of bundle structure
 
 Contains a module to parse filenames and 
-abstract titles as well as a module to check 
-sanity of bundle structure.
+abstract titles, a module to read the 
+abstracts' metadata, a module to check 
+sanity of bundle structure, a module 
+to record created bundles in a manifest, 
+a module to index the TEI files of 
+a bundle structure and a module to 
+match titles of abstracts.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import csv
+import errno
+from itertools import repeat
 import json
 import logging
 from lxml import etree
 import os
-from shutil import copyfile
+from shutil import copyfile, rmtree
+import sys
 from xml.etree import ElementTree as ET
 import yaml
+import metrics
+from bundles import manifest
 from bundles import parsing
+from bundles import records
 from bundles import sanity
+from bundles import titles
 
 # set base paths for working diretories
 with open(r'config.yml') as file:
@@ -25,6 +39,16 @@ XMLParser = etree.XMLParser()
 ET.register_namespace('', "http://www.tei-c.org/ns/1.0")
 namespace = {'TEI': "http://www.tei-c.org/ns/1.0"}  
 
+# metadata required to create json metadata of bundles
+REQUIRED_METADATA = ["upload_type", "publication_date", "title", "access_right", "license", "keywords", "community",
+                     "conference_title", "conference_acronym", "conference_dates", "conference_place", "conference_url"]
+
+# modes to place publication files in bundles
+LINK_MODES = ["copy", "hardlink", "reflink", "symlink"]
+
+# ioctl request to clone a file on copy-on-write filesystems (linux)
+FICLONE = 0x40049409
+
 
 class Conference:
     """Conference class 
@@ -63,14 +87,25 @@ class Conference:
             Name of conference's directory containing all pdf files
         xml : str
             Name of conference's directory containing all xml files
+        pdf_files : sanity.DirectorySnapshot
+            Listing of conference's pdf directory (scanned once)
+        xml_files : sanity.DirectorySnapshot
+            Listing of conference's xml directory (scanned once, None if no xml directory is given)
         abstracts : list
-            List of metadata elements from conference's metadata file
+            List of abstracts from conference's metadata file (see records.Abstract)
         titles : list
             List of titles from conference's metadata file
+        metrics : metrics.Metrics
+            Durations of the phases of the run (scan, parse, assign, verify, json, build, copy, csv)
         """
 
         # set parameters of Conference instance
         self.name = name
+
+        # set logging (before any check in order to log warnings in logging file)
+        set_logging(config['logging_dir'] + self.name +'_bundle.log')
+        self.metrics = metrics.Metrics({"run": "bundle", "conference": self.name})
+
         self.source = sanity.readable_dir(os.path.join(config['input_base'], name))
         self.output = self.__create_output_dir()
         self.metadata = sanity.readable_file(os.path.join(self.source, metadata))
@@ -80,72 +115,182 @@ class Conference:
             self.xml = sanity.readable_dir(os.path.join(self.source, xml))
         else:
             self.xml = None
-        self.abstracts = self.__get_abstracts()
-        self.titles = self.__get_titles()
-
-        # set logging
-        logging.basicConfig(filename=config['logging_dir'] + self.name +'_bundle.log', filemode='w+', level=logging.INFO)
+        with self.metrics.timer("scan"):
+            self.pdf_files = sanity.DirectorySnapshot(self.pdf)
+            self.xml_files = sanity.DirectorySnapshot(self.xml) if self.xml else None
+        with self.metrics.timer("parse"):
+            self.abstracts = self.__get_abstracts()
+            self.titles = self.__get_titles()
+            self.__check_duplicate_titles()
 
         # check sanity of pdf and xml directories
-        sanity.directory(self.pdf)
-        if self.xml:
-            sanity.directory(self.xml)
-            sanity.filenames(self)
+        with self.metrics.timer("scan"):
+            sanity.directory(self.pdf_files)
+            if self.xml:
+                sanity.directory(self.xml_files)
+                sanity.filenames(self)
         
-    def create_bundles(self) -> None:
+    def create_bundles(self, jobs: int = 1, link_mode: str = "copy", executor: ThreadPoolExecutor = None) -> None:
         """Create bundle structure
 
         Creates bundle structure for conference in 
         configured output_base directory (see config.yml file). 
+        The created bundles are recorded in a manifest (see manifests_dir in config.yml). 
+        On re-run only bundles with changed files or metadata are rebuilt and 
+        bundles which are no longer assigned are removed. Existing bundle directories 
+        which aren't recorded in the manifest are skipped. If more than one abstract 
+        is assigned to the same bundle name, only the bundle of the first abstract is created.
 
         Please see README.md for more detailed documentation.
+
+        Parameters
+        ----------
+        jobs : int
+            Number of threads creating the bundles concurrently (Default: 1)
+        link_mode : str
+            Mode to place the pdf and xml files in the bundles (see LINK_MODES). 
+            If the filesystem doesn't support the mode, the files will be copied. (Default: "copy")
+        executor : ThreadPoolExecutor
+            Worker pool creating the bundles, e.g. shared by the conferences of a batch 
+            (Default: None, a pool with `jobs` threads is created)
+
+        Raises
+        ------
+        Exception
+            If bundles could not be created.
         """
-        
-        counter = 1
 
         # assign xmls and pdfs to publications
-        assignments = self.__assign_files()
-
-        # create bundle structure
-        for bundle in assignments:
-            try:
-                
-                # create directories
-                bundle_dir = os.path.join(self.output, bundle['name'])
-
-                os.mkdir(bundle_dir)
-                os.mkdir(os.path.join(bundle_dir, 'bundle_publications'))
-
-                # copy pdf file
-                pdf_path = os.path.join(self.pdf, bundle['pdf'])
-                copyfile(pdf_path, os.path.join(bundle_dir,'bundle_publications', bundle['pdf']))
-                
-                # copy xml file
-                if self.xml:
-                    xml_path = os.path.join(self.xml, bundle['xml'])
-                    copyfile(xml_path, os.path.join(bundle_dir,'bundle_publications', bundle['xml']))
-                
-                # create json metadata file
-                for elem in self.abstracts:
-                    if elem.find("title").text == bundle["title"]:
-                        create_metadata(elem, bundle_dir)
-                    else:
-                        continue
-
-            except OSError:
-                logging.warning(f"Directory {bundle_dir} already exists. Continue..")
-            finally:
-                counter = counter + 1
+        with self.metrics.timer("assign"):
+            assignments = self.__assign_files()
+
+        # verify assignments with titles of xml files (parsed in parallel)
+        with self.metrics.timer("verify"), nullcontext(executor) if executor else ThreadPoolExecutor(max_workers=jobs) as pool:
+            self.__verify_assignments(assignments, pool)
+
+        # get json metadata of bundles in order of assignments (deterministic logging)
+        with self.metrics.timer("json"):
+            metadata = [get_json_metadata(self.abstracts[bundle["index"]]) for bundle in assignments]
+
+        # remove bundles of previous run which are no longer assigned
+        manifest_file = os.path.join(config['manifests_dir'], self.name + ".json")
+        previous = manifest.load(manifest_file)
+        assigned = set(bundle['name'] for bundle in assignments)
+        for bundle_name in previous:
+            if bundle_name not in assigned and os.path.isdir(os.path.join(self.output, bundle_name)):
+                logging.info(f"Remove bundle {bundle_name} which is no longer assigned.")
+                rmtree(os.path.join(self.output, bundle_name))
+
+        # create bundle structure (abstracts with the name of another assignment aren't created,
+        # so that no worker replaces the bundle of another abstract)
+        duplicates = self.__find_duplicate_names(assignments)
+        unique = [position for position in range(len(assignments)) if position not in duplicates]
+        with self.metrics.timer("build"), nullcontext(executor) if executor else ThreadPoolExecutor(max_workers=jobs) as pool:
+            built = pool.map(self.__create_bundle, [assignments[position] for position in unique],
+                             [metadata[position] for position in unique], repeat(link_mode),
+                             [previous.get(assignments[position]['name']) for position in unique])
+            results = dict(zip(unique, built))
+        for position, first in duplicates.items():
+            results[position] = {"entry": None, "error": f"Bundle name is already assigned to abstract with title "
+                                 f"{assignments[first]['title']}", "copied": False, "rebuilt": False, "skipped": False}
+
+        # log results in order of assignments
+        errors = []
+        current = {}
+        skipped = []
+        if any(result["copied"] for result in results.values()):
+            logging.warning(f"Link mode '{link_mode}' is not supported for all files, these files have been copied.")
+        for position, bundle in enumerate(assignments):
+            result = results[position]
+            if result["error"]:
+                logging.warning(f"Bundle {bundle['name']} of abstract with title {bundle['title']} could not be created: {result['error']}")
+                errors.append(bundle['name'])
+                # keep bundle of previous run recorded, so that its directory is replaced on next run
+                if previous.get(bundle['name']) and bundle['name'] not in current:
+                    current.update({bundle['name']: previous[bundle['name']]})
+            elif result["skipped"]:
+                skipped.append(bundle['name'])
+            else:
+                current.update({bundle['name']: result["entry"]})
+        if skipped:
+            logging.warning(f"The directories of the following bundles already exist and aren't recorded in manifest {manifest_file}, "
+                            f"they have been skipped (remove them to create the bundles): {skipped}")
+        rebuilt = sum(1 for result in results.values() if result["rebuilt"] and not result["error"])
+        unchanged = len(assignments) - rebuilt - len(skipped) - len(errors)
+        logging.info(f"{rebuilt} bundles have been (re)built, {unchanged} bundles are up to date.")
+        self.metrics.increment("bundles_total", rebuilt, state="rebuilt")
+        self.metrics.increment("bundles_total", unchanged, state="unchanged")
+        self.metrics.increment("bundles_total", len(skipped), state="skipped")
+        self.metrics.increment("bundles_total", len(errors), state="failed")
+
+        # record created bundles (failed bundles will be rebuilt on next run, skipped bundles aren't recorded)
+        manifest.save(current, manifest_file)
 
         # check if created bundle structure is complete
         self.__quality_check()
-        # create csv file with assigned files to bundles
-        self.__create_csv()
+        # create csv file with assigned files to bundles (also if bundles have failed, so that assignments can be checked)
+        with self.metrics.timer("csv"):
+            self.__create_csv(assignments)
+        if errors:
+            raise Exception(f"{len(errors)} bundles could not be created: {errors}. Please check logging file for more information.")
 
         # finish
         logging.info(f"Bundle structure of conference {self.name} has been created under "
                     f"'{self.output}'.")
 
+    def get_bundles(self, audit: bool = False, link_mode: str = "copy"):
+        """Yields bundles of conference without creating bundle structure
+
+        Assigns the files to the abstracts and creates the json metadata of each bundle
+        in memory when the bundle is requested, so that the bundles can be uploaded
+        directly from the conference directory (see api.Connection.upload). The csv file
+        with the assigned files is created in any case.
+
+        Parameters
+        ----------
+        audit : bool
+            Determines whether the bundles are written to configured output_base directory
+            as well, e.g. to check them after upload (Default: False)
+        link_mode : str
+            Mode to place the pdf and xml files in the bundles written for audit (see LINK_MODES, Default: "copy")
+
+        Yields
+        ------
+        bundle : dict
+            Name of bundle, paths to its publication files in conference directory and its json metadata
+            (in order of bundle names)
+        """
+
+        assignments = self.__assign_files()
+        with ThreadPoolExecutor() as pool:
+            self.__verify_assignments(assignments, pool)
+        self.__create_csv(assignments)
+        duplicates = self.__find_duplicate_names(assignments)
+        for position, first in duplicates.items():
+            logging.warning(f"Abstract with title {assignments[position]['title']} isn't uploaded, its bundle name "
+                            f"{assignments[position]['name']} is already assigned to abstract with title {assignments[first]['title']}.")
+        unique = [bundle for position, bundle in enumerate(assignments) if position not in duplicates]
+        for bundle in sorted(unique, key=lambda bundle: bundle["name"]):
+            data = get_json_metadata(self.abstracts[bundle["index"]])
+            publications = [os.path.join(self.pdf, bundle['pdf'])]
+            if self.xml:
+                publications.append(os.path.join(self.xml, bundle['xml']))
+            if audit:
+                result = self.__create_bundle(bundle, data, link_mode, None)
+                if result["error"]:
+                    logging.warning(f"Bundle {bundle['name']} could not be written for audit: {result['error']}")
+            yield {"name": bundle["name"], "publications": publications, "metadata": data}
+
+    def write_metrics(self) -> None:
+        """Writes metrics of run
+
+        Writes the durations of the phases of the run to [CONFERENCE]_bundle.json 
+        (and [CONFERENCE]_bundle.prom if metrics_prometheus is set) under configured 
+        metrics_dir (see config.yml file).
+        """
+
+        self.metrics.write(config['metrics_dir'] + self.name + "_bundle", prometheus=config.get('metrics_prometheus', False))
+
     def update_metadata(self):
         """Update conference's metadata
         
@@ -180,8 +325,7 @@ class Conference:
 
     # get pdf files of conference
     def __get_pdfs(self) -> dict:
-        files = [f for f in os.listdir(self.pdf) if f != ".DS_Store"]
-        files.sort()
+        files = list(self.pdf_files.files)
         if len(files) != len(self.abstracts):
             logging.warning(f"Number of pdf files in conference pdf directory {self.pdf} does not match number of metadata tags in conference metadata file {self.metadata}. \n \
                               Files ({len(files)} - Element-Tags ({len(self.abstracts)}).")
@@ -191,8 +335,7 @@ class Conference:
 
     # get xml files of conference
     def __get_xmls(self) -> dict:
-        xmls = [f for f in os.listdir(self.xml) if f != ".DS_Store"]
-        xmls.sort()
+        xmls = list(self.xml_files.files)
         if len(xmls) != len(self.abstracts):
             logging.warning((f"Number of xml files in conference xml directory {self.xml} does not match number of metadata tags in conference metadata file {self.metadata}. \n \
                               Files ({len(xmls)} - Element-Tags ({len(self.abstracts)})."))
@@ -202,62 +345,81 @@ class Conference:
 
     # parse metadata file of conference end return abstracts metadata
     def __get_abstracts(self) -> list:
-        tree = ET.parse(self.metadata)
-        abstracts = tree.findall("metadata")
-        return abstracts
+        return records.load_abstracts(self.metadata)
 
     # get titles of conference's abstracts from metadata file
     def __get_titles(self) -> list:
         titles = []
-        for abstract in self.abstracts:
-            title = abstract.find("title").text
+        for index, abstract in enumerate(self.abstracts):
+            title = abstract.raw_title
             if not title:
-                raise Exception(f"The publication with index {self.abstracts.index(abstract)} does not contain a title")
+                raise Exception(f"The publication with index {index} does not contain a title")
             titles.append(title)
         return titles
+
+    # log titles occurring more than once (abstracts are referenced by their index in metadata file, not by title)
+    def __check_duplicate_titles(self) -> None:
+        seen = set()
+        duplicates = []
+        for title in self.titles:
+            if title in seen:
+                duplicates.append(title)
+            seen.add(title)
+        if duplicates:
+            logging.warning(f"The following titles occur more than once in conference metadata file {self.metadata}: {duplicates}")
     
     # assign files to abstracts metadata from metadata file
     def __assign_files(self) -> list:
         assignments = []
+        # list conference files once for all abstracts
+        pdfs = self.__get_pdfs()
+        if self.xml:
+            xmls = self.__get_xmls()
         if self.sequenced:
             # assign files by indexes
             for index, title in enumerate(self.titles):
                 bundle = {}
-                bundle.update({"title": title})
-                pdf = self.__get_pdfs()[index]
+                bundle.update({"index": index, "title": title})
+                pdf = pdfs[index]
                 bundle.update({"pdf": pdf})
                 if self.xml:
-                    xml = self.__get_xmls()[index]
+                    xml = xmls[index]
                     bundle.update({"xml": xml})
                 bundle_name = os.path.splitext(pdf)[0]
                 bundle.update({"name": bundle_name})
                 assignments.append(bundle)
         else:
+            # index filenames once in order to compare them with possible names of each abstract
+            file_index = parsing.FilenameIndex(parsing.get_comparable_filenames(pdfs))
+            if self.xml:
+                xml_files = set(xmls)
+
             # assign files by name scheme
             for index, abstract in enumerate(self.abstracts):
                 bundle = {}
-                bundle.update({"title": abstract.find("title").text})
-
-                # get pdfs
-                pdfs = self.__get_pdfs()
-                file_names_to_compare = parsing.get_comparable_filenames(pdfs)
+                bundle.update({"index": index, "title": abstract.raw_title})
 
                 # get possible bundle names
                 names = parsing.get_bundle_names(abstract)
 
-                # assign pdf file to abstract
-                assigned_pdf = parsing.get_abstract_file(names, file_names_to_compare, index) + ".pdf"
+                # assign pdf file to abstract (file with abstract's index if no filename matches)
+                assigned_pdf = file_index.find(names)
+                if assigned_pdf is None:
+                    logging.warning(f"No filename matches the name scheme of abstract {index} with title {abstract.raw_title}, "
+                                    f"file with same index is assigned.")
+                    assigned_pdf = file_index.files[index]
+                    bundle.update({"fallback": True})
+                assigned_pdf = assigned_pdf + ".pdf"
                 bundle.update({"pdf": assigned_pdf})
 
                 # filename
                 bundle_name = os.path.splitext(assigned_pdf)[0]
 
-                # assign xml file to abstract
+                # assign xml file to abstract (sanity of filenames has been checked in constructor)
                 if self.xml:
-                    # check sanity of filenames in pdf and xml directory
-                    sanity.filenames(self)
-                    xmls = self.__get_xmls()
-                    xml = xmls[xmls.index(bundle_name + ".xml")]
+                    xml = bundle_name + ".xml"
+                    if xml not in xml_files:
+                        raise ValueError(f"'{xml}' is not in list")
                     bundle.update({"xml": xml})
                 bundle.update({"name": bundle_name})
 
@@ -265,6 +427,148 @@ class Conference:
 
         return assignments
 
+    # verify assignments with titles of xml files, assignments by name scheme with low similarity or duplicate files
+    # are resolved by an optimal matching of their titles with the titles of the remaining xml files
+    def __verify_assignments(self, assignments: list, pool: ThreadPoolExecutor) -> None:
+        if not self.xml:
+            # nothing to verify without xml files
+            for bundle in assignments:
+                bundle.update({"status": "fallback" if bundle.get("fallback") else "unverified"})
+            self.__count_statuses(assignments)
+            return
+        threshold = config.get('assignment_match_threshold', 0.8)
+
+        # parse titles of all xml files at the same time
+        xmls = sorted(self.xml_files.files)
+        xml_titles = dict(zip(xmls, pool.map(self.__get_xml_title, xmls)))
+        abstract_titles = [self.abstracts[bundle["index"]].title for bundle in assignments]
+        for bundle, title in zip(assignments, abstract_titles):
+            bundle.update({"xml_title": xml_titles[bundle["xml"]],
+                           "score": titles.similarity(title, xml_titles[bundle["xml"]])})
+
+        # find assignments by name scheme with low similarity or with a file assigned more than once
+        uncertain = []
+        if not self.sequenced:
+            assigned = {}
+            for bundle in assignments:
+                assigned[bundle["xml"]] = assigned.get(bundle["xml"], 0) + 1
+            uncertain = [position for position, bundle in enumerate(assignments)
+                         if bundle["score"] < threshold or assigned[bundle["xml"]] > 1]
+
+        # assign files of uncertain assignments and unassigned files with maximum total similarity of titles
+        # (the number of files equals the number of abstracts, so each uncertain abstract gets one of these files)
+        if uncertain:
+            logging.info(f"Match titles of {len(uncertain)} abstracts with low similarity to their xml files or duplicate files..")
+            uncertain_positions = set(uncertain)
+            certain = set(bundle["xml"] for position, bundle in enumerate(assignments) if position not in uncertain_positions)
+            candidates = [xml for xml in xmls if xml not in certain]
+            matches = titles.assign_titles([abstract_titles[position] for position in uncertain],
+                                           [xml_titles[xml] for xml in candidates])
+            for position, (column, score) in zip(uncertain, matches):
+                bundle = assignments[position]
+                xml = candidates[column]
+                if xml != bundle["xml"]:
+                    logging.info(f"Reassign abstract with title {bundle['title']} from {bundle['xml']} to {xml} "
+                                 f"(similarity {bundle['score']:.2f} -> {score:.2f}).")
+                    name = os.path.splitext(xml)[0]
+                    bundle.update({"name": name, "pdf": name + ".pdf", "xml": xml, "xml_title": xml_titles[xml],
+                                   "score": score, "status": "reassigned"})
+
+        # set status of assignments
+        mismatches = []
+        for bundle in assignments:
+            if bundle["score"] < threshold:
+                bundle.update({"status": "mismatch"})
+                mismatches.append(bundle["name"])
+                logging.warning(f"Title of abstract {bundle['title']} doesn't match title of assigned xml file {bundle['xml']} "
+                                f"{bundle['xml_title']} (similarity {bundle['score']:.2f}).")
+            elif "status" not in bundle:
+                bundle.update({"status": "verified"})
+        self.__count_statuses(assignments)
+        if mismatches:
+            logging.warning(f"{len(mismatches)} assignments have titles with similarity below {threshold}: {mismatches}. "
+                            f"Please check {config['assignments_dir'] + self.name + '.csv'} before upload.")
+
+    # return positions of assignments with the bundle name of another assignment (with position of the other assignment),
+    # assignments by name scheme keep the bundle name before assignments of a fallback file
+    def __find_duplicate_names(self, assignments: list) -> dict:
+        first = {}
+        duplicates = {}
+        for position in sorted(range(len(assignments)), key=lambda position: (bool(assignments[position].get("fallback")), position)):
+            bundle = assignments[position]
+            if bundle['name'] in first:
+                duplicates[position] = first[bundle['name']]
+            else:
+                first[bundle['name']] = position
+        return duplicates
+
+    # count assignments by status
+    def __count_statuses(self, assignments: list) -> None:
+        statuses = {}
+        for bundle in assignments:
+            statuses[bundle["status"]] = statuses.get(bundle["status"], 0) + 1
+        for status, count in sorted(statuses.items()):
+            self.metrics.increment("assignments_total", count, status=status)
+
+    # get title of xml file (executed in worker threads), empty string if xml file can't be read
+    def __get_xml_title(self, xml: str) -> str:
+        try:
+            return get_xml_title(os.path.join(self.xml, xml))
+        except (OSError, etree.XMLSyntaxError) as error:
+            logging.warning(f"Couldn't read title of xml file {xml}: {error}")
+            return ""
+
+    # create bundle directory with files and json metadata if bundle has changed since previous run (executed in worker threads),
+    # returns manifest entry, error instead of raising it, whether files have been copied instead of linked and
+    # whether the bundle has been skipped (directory exists, but isn't recorded in manifest of previous run)
+    def __create_bundle(self, bundle: dict, data: dict, link_mode: str, previous: dict) -> dict:
+        result = {"entry": None, "error": None, "copied": False, "rebuilt": False, "skipped": False}
+        copied = False
+        bundle_dir = os.path.join(self.output, bundle['name'])
+        try:
+            # keep directories which haven't been created by a previous run
+            if previous is None and os.path.lexists(bundle_dir):
+                result["skipped"] = True
+                return result
+
+            # skip bundle if files and metadata haven't changed
+            files = {"pdf": os.path.join(self.pdf, bundle['pdf'])}
+            if self.xml:
+                files.update({"xml": os.path.join(self.xml, bundle['xml'])})
+            result["entry"] = manifest.get_bundle_entry(files, data, link_mode, previous)
+            bundle_files = [os.path.join(bundle_dir, 'bundle_publications', os.path.basename(path)) for path in files.values()]
+            if not manifest.changed(result["entry"], previous) and \
+                    all(os.path.lexists(path) for path in bundle_files + [os.path.join(bundle_dir, 'bundle_metadata.json')]):
+                return result
+
+            # create directories (replace bundle of previous run)
+            result["rebuilt"] = True
+            if os.path.isdir(bundle_dir):
+                rmtree(bundle_dir)
+            os.mkdir(bundle_dir)
+            os.mkdir(os.path.join(bundle_dir, 'bundle_publications'))
+
+            with self.metrics.timer("copy"):
+                # place pdf file
+                pdf_path = os.path.join(self.pdf, bundle['pdf'])
+                copied |= place_file(pdf_path, os.path.join(bundle_dir,'bundle_publications', bundle['pdf']), link_mode) != link_mode
+
+                # place xml file
+                if self.xml:
+                    xml_path = os.path.join(self.xml, bundle['xml'])
+                    copied |= place_file(xml_path, os.path.join(bundle_dir,'bundle_publications', bundle['xml']), link_mode) != link_mode
+
+            # create json metadata file
+            with self.metrics.timer("json"):
+                write_metadata(data, bundle_dir)
+        except OSError as error:
+            result["error"] = error
+            # remove incomplete bundle, it isn't recorded in manifest and is created again on next run
+            if result["rebuilt"]:
+                rmtree(bundle_dir, ignore_errors=True)
+        result["copied"] = copied
+        return result
+
     # creates output directory for bundle structure
     def __create_output_dir(self) -> str:
         output_dir = os.path.join(config['output_base'], os.path.basename(self.name))
@@ -276,52 +580,114 @@ class Conference:
 
     # checks if files und bundles contain the same number of files
     def __quality_check(self) -> None:
+        expected = 2 if self.xml else 1
+        defective_dirs = []
+        for bundle_dir in sanity.DirectorySnapshot(self.output).directories:
+            try:
+                with os.scandir(os.path.join(self.output, bundle_dir, "bundle_publications")) as entries:
+                    number_of_files = sum(1 for _ in entries)
+            except FileNotFoundError:
+                number_of_files = 0
+            if number_of_files != expected:
+                defective_dirs.append(bundle_dir)
         if not self.xml:
-            defective_dirs = [bundle_dir for bundle_dir in os.listdir(self.output) if len(os.listdir(os.path.join(self.output, bundle_dir, "bundle_publications"))) != 1]
             logging.info(f"The following directories do not contain the pdf file: {defective_dirs}")
         else:
-            defective_dirs = [bundle_dir for bundle_dir in os.listdir(self.output) if len(os.listdir(os.path.join(self.output, bundle_dir, "bundle_publications"))) != 2]
             logging.info(f"The following directories do not contain two files: {defective_dirs}")
 
     # create csv file with overview of assigned files to bundles
-    def __create_csv(self) -> None:
+    def __create_csv(self, assignments: list) -> None:
 
         with open(config['assignments_dir'] + self.name + ".csv", 'w', encoding='utf-8', newline='') as csv_file:
             if self.xml:
-                fieldnames = ["Bundle", "Title", "Title from xml", "PDF", "XML"]
+                fieldnames = ["Bundle", "Title", "Title from xml", "Similarity", "Status", "PDF", "XML"]
             else:
-                fieldnames = ["Bundle", "Title", "PDF"]
+                fieldnames = ["Bundle", "Title", "Status", "PDF"]
 
             writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
             writer.writeheader()
 
-            for bundle in os.listdir(self.output):
-                bundle_path = os.path.join(self.output, bundle)
-                publications = os.path.join(bundle_path, "bundle_publications")
-
-                # get title from json metadata
-                with open (os.path.join(bundle_path, 'bundle_metadata.json'), 'r') as f:
-                    metadata = json.load(f)["metadata"]
-                title = metadata["title"]
-                
-                # get file names            
-                for f in os.listdir(publications):
-                    if f.endswith('.pdf'):
-                        pdf = f
-                    elif f.endswith('.xml'):
-                        xml = f
-                    else:
-                        raise Exception("The publication files do not have the correct format. Please check if all files are either pdf or xml files.")
+            for bundle in assignments:
+                # get title from abstract's metadata
+                title = self.abstracts[bundle["index"]].title
 
                 if self.xml:
-                    bundle_data = {'Bundle': bundle, 'Title': title, 'PDF': pdf, 'XML': xml}
+                    bundle_data = {'Bundle': bundle['name'], 'Title': title, 'Title from xml': bundle['xml_title'],
+                                   'Similarity': round(bundle['score'], 3), 'Status': bundle['status'],
+                                   'PDF': bundle['pdf'], 'XML': bundle['xml']}
                 else:
-                    bundle_data = {'Bundle': bundle, 'Title': title, 'PDF': pdf}
+                    bundle_data = {'Bundle': bundle['name'], 'Title': title, 'Status': bundle['status'], 'PDF': bundle['pdf']}
 
                 # write bundle data in csv file
                 writer.writerow(bundle_data)
 
 
+def set_logging(logging_file: str) -> None:
+    """Writes logging of the following steps to logging file
+
+    Replaces the logging handlers of previous steps (e.g. of the previous conference of a batch), 
+    as logging.basicConfig only takes effect once per process unless it is forced.
+
+    Parameters
+    ----------
+    logging_file : str
+        Path to logging file (overwritten)
+    """
+
+    logging.basicConfig(filename=logging_file, filemode='w+', level=config.get('log_level', 'INFO'), force=True)
+
+
+def place_file(source: str, destination: str, link_mode: str = "copy") -> str:
+    """Places publication file in bundle
+
+    Links the file to the destination according to the given link mode 
+    and falls back to copying the file if the filesystem doesn't support the mode.
+
+    Parameters
+    ----------
+    source : str
+        Path to publication file in conference directory
+    destination : str
+        Path to publication file in bundle
+    link_mode : str
+        One of LINK_MODES:
+        'copy' copies the file, 'hardlink' creates a hard link, 'reflink' clones the file 
+        on copy-on-write filesystems (e.g. btrfs, XFS) and 'symlink' creates a symbolic link 
+        to the absolute path of the file.
+
+    Returns
+    -------
+    link_mode : str
+        Mode that has been used to place the file
+    
+    Raises
+    ------
+    ValueError
+        If link mode is unknown.
+    """
+
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode '{link_mode}'. Choose one of {LINK_MODES}.")
+    try:
+        if link_mode == "hardlink":
+            os.link(source, destination)
+            return link_mode
+        if link_mode == "symlink":
+            os.symlink(os.path.abspath(source), destination)
+            return link_mode
+        if link_mode == "reflink" and sys.platform.startswith("linux"):
+            import fcntl
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return link_mode
+    except OSError as error:
+        # raise errors which are not caused by missing support of filesystem
+        if error.errno not in [errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS]:
+            raise
+    copyfile(source, destination)
+    return "copy"
+
+
 def get_xml_title(xml_file: str) -> str:
     """Returns title of abstract's xml file (TEI)
 
@@ -333,157 +699,144 @@ def get_xml_title(xml_file: str) -> str:
     Returns
     -------
     title : str
-        Text of title tag
+        Text of title tag in title statement including the text of nested tags (e.g. 'hi'),
+        main and sub title joined if there is more than one title tag
+        (empty string if no title tag could be found in xml file)
     """
 
-    tree = ET.parse(xml_file)
-    try:
-        title_tags = tree.findall(".//TEI:title", namespace)
-        # if xml file contains only one title tag get text from this tag
-        if len(title_tags) == 1:
-            title = title_tags[0].text
-        # else get content of title tag with attribute 'type'='main'
-        else:
-            try:
-                title =" ".join([elem.text for elem in title_tags if elem.attrib['type'] in ["main", "sub"]])
-            except TypeError:
-                for elem in title_tags:
-                    if elem.attrib["type"]=="main":
-                        title = elem.text
-    # return empty string if no title tag could be found in xml file
-    except AttributeError:
+    # parse teiHeader only (by lxml, which releases the GIL, so that files can be parsed in parallel threads)
+    title_tags = []
+    for _, elem in etree.iterparse(xml_file, events=("end",)):
+        if elem.tag in ["{%s}titleStmt" % namespace["TEI"], "{%s}teiHeader" % namespace["TEI"]]:
+            title_tags = elem.findall(".//TEI:title", namespace)
+            break
+    # if xml file contains only one title tag get text from this tag
+    if len(title_tags) == 1:
+        title = __get_text(title_tags[0])
+    # else get content of title tags with attribute 'type'='main' or 'sub' (or first title tag with text)
+    else:
+        title = " ".join(text for text in (__get_text(elem) for elem in title_tags if elem.get("type") in ["main", "sub"]) if text)
+        if not title:
+            title = next((text for text in map(__get_text, title_tags) if text), "")
+    if not title:
         logging.warning(f"Couldn't extract title from file {xml_file}")
-        title = ""
     return title
 
 
-def create_metadata(pub: ET.Element, bundle_path: str) -> None:
+# return text of element and its descendants with collapsed whitespace
+def __get_text(elem) -> str:
+    return " ".join("".join(elem.itertext()).split())
+
+
+def create_metadata(pub: records.Abstract, bundle_path: str) -> None:
     """Create bundle's json metadata file
 
     Parameters
     ----------
-    pub: ET.Element
-        Metadata element of given bundle from conference's metadata file
+    pub: records.Abstract
+        Abstract of given bundle from conference's metadata file
     bundle_path: str
         Path to bundle
     """
 
-    # get bundle information and translate into json format
-    logging.info(f"Create bundle for publication: {pub.find('title').text}")
+    write_metadata(get_json_metadata(pub), bundle_path)
 
-    try:
-        data = {"metadata": {"upload_type": pub.find("upload_type").text.replace("\n", ""),
-                            "publication_type" if pub.find("upload_type").text.replace("\n", "")=="publication" else "dump_publicationtype" : pub.find("publication_type").text if pub.find("upload_type").text.replace("\n", "")=="publication" else None,
-                            "publication_date": pub.find("publication_date").text.replace("\n", ""),
-                            "title": ' '.join(pub.find("title").text.replace("\n", "").split()),
-                            "creators": __get_creators(pub),
-                            "description": ' '.join(pub.find("description").text.replace("\n", "").split()),
-                            "access_right": pub.find("access_right").text.replace("\n", ""),
-                            "license": pub.find("license").text.replace("\n", ""),
-                            "doi": "",
-                            "keywords": [' '.join(elem.replace("\"", "").split()) for elem in pub.find("keywords").text.replace("\n", "").split(", ")],
-                            "related_identifiers" if pub.find("related_identifiers") else "dump_relatedids": __get_related_identifiers(pub),
-                            "contributors": __get_contributors(pub),
-                            "communities": [{"identifier": pub.find("communities/identifier").text}],
-                            "conference_title": ' '.join(pub.find("conference_title").text.replace("\n", "").split()),
-                            "conference_acronym": pub.find("conference_acronym").text.replace("\n", ""),
-                            "conference_dates": pub.find("conference_dates").text.replace("\n", ""),
-                            "conference_place": pub.find("conference_place").text.replace("\n", ""),
-                            "conference_url": pub.find("conference_url").text.replace("\n", "")
-                            }
-                }
-    except AttributeError:
-        data = {"metadata": {"upload_type": pub.find("upload_type").text.replace("\n", ""),
-                             "publication_type" if pub.find("upload_type").text.replace("\n",
-                                                                                        "") == "publication" else "dump_publicationtype": pub.find(
-                                 "publication_type").text if pub.find("upload_type").text.replace("\n",
-                                                                                                  "") == "publication" else None,
-                             "publication_date": pub.find("publication_date").text.replace("\n", ""),
-                             "title": ' '.join(pub.find("title").text.replace("\n", "").split()),
-                             "creators": __get_creators(pub),
-                             "description": "",
-                             "access_right": pub.find("access_right").text.replace("\n", ""),
-                             "license": pub.find("license").text.replace("\n", ""),
-                             "doi": "",
-                             "keywords": [' '.join(elem.replace("\"", "").split()) for elem in
-                                          pub.find("keywords").text.replace("\n", "").split(", ")],
-                             "related_identifiers" if pub.find(
-                                 "related_identifiers") else "dump_relatedids": __get_related_identifiers(pub),
-                             "contributors": __get_contributors(pub),
-                             "communities": [{"identifier": pub.find("communities/identifier").text}],
-                             "conference_title": ' '.join(pub.find("conference_title").text.replace("\n", "").split()),
-                             "conference_acronym": pub.find("conference_acronym").text.replace("\n", ""),
-                             "conference_dates": pub.find("conference_dates").text.replace("\n", ""),
-                             "conference_place": pub.find("conference_place").text.replace("\n", ""),
-                             "conference_url": pub.find("conference_url").text.replace("\n", "")
-                             }
-                }
-    try:
-        del data["metadata"]["dump_publicationtype"]
-        logging.info("Upload type is not 'publication' so the publication_type will not be added to the json file.")
-    except KeyError:
-        logging.info("'publication_type' has been added to the json file.")
 
-    try:
-        del data["metadata"]["dump_relatedids"]
-        logging.info("Metadata does not contain tag related_identifier, so the related_identifiers will not be added to the json file.")
-    except KeyError:
-        logging.info("'related_identifiers' have been added to json file.")
+def write_metadata(data: dict, bundle_path: str) -> None:
+    """Save json metadata file in bundle path
+
+    Parameters
+    ----------
+    data: dict
+        Json metadata of bundle
+    bundle_path: str
+        Path to bundle
+    """
 
-    # save json metadata file in bundle path
     with open(os.path.join(bundle_path, 'bundle_metadata.json'), 'w') as outfile:
         json.dump(data, outfile)
 
 
-def __get_related_identifiers(pub):
-    rel_ids = []
-    for related_identifier in pub.findall("related_identifiers/related_identifier"):
-        identifier_dict = {}
-        identifier_dict.update({"relation": related_identifier.find("relation").text.replace("\n", "")})
-        identifier_dict.update({"identifier": related_identifier.find("identifier").text.replace("\n", "")})
-        identifier_dict.update({"resource_type": related_identifier.find("resource_type").text.replace("\n", "")})
-
-        rel_ids.append(identifier_dict)
-
-    return rel_ids
-
-
-def __get_creators(pub):
-    creators = []
-    for creator in pub.findall("creators/creator"):
-        creator_dict = {}
-        creator_dict.update({"name": creator.find("name").text.replace("\n", "")})
-
-        try:
-            creator_dict.update({"affiliation": ' '.join(creator.find("affiliation").text.replace("\n", "").split())})
-        except AttributeError:
-            logging.info(f"Creator {creator.find('name').text} has no affiliation.")
+def get_json_metadata(pub: records.Abstract) -> dict:
+    """Returns bundle's json metadata
 
-        try:
-            creator_dict.update({"orcid": creator.find("orcid").text.replace("\n", "")})
-        except AttributeError:
-            logging.info(f"Creator {creator.find('name').text} has no orcid.")
-
-        creators.append(creator_dict)
-    return creators
+    Parameters
+    ----------
+    pub: records.Abstract
+        Abstract of given bundle from conference's metadata file
 
+    Returns
+    -------
+    data: dict
+        Metadata in json format of Zenodo API
 
-def __get_contributors(pub):
-    contributors = []
-    for contributor in pub.findall("contributors/contributor"):
-        contributor_dict = {}
-        contributor_dict.update({"name": contributor.find("name").text.replace("\n", "")})
-        contributor_dict.update({"affiliation": ' '.join(contributor.find("affiliation").text.replace("\n", "").split())})
+    Raises
+    ------
+    Exception
+        If required metadata is missing.
+    """
 
-        try:
-            contributor_dict.update({"orcid": contributor.find("orcid").text.replace("\n", "")})
-        except:
-            logging.info(f"Creator {contributor.find('name').text} has no orcid.")
+    # get bundle information and translate into json format
+    logging.info(f"Create bundle for publication: {pub.raw_title}")
 
-        contributor_dict.update({"type": contributor.find("type").text.replace("\n", "")})
+    missing = [field for field in REQUIRED_METADATA if getattr(pub, field) is None]
+    if missing:
+        raise Exception(f"The publication with title {pub.raw_title} does not contain the following metadata: {missing}")
 
-        contributors.append(contributor_dict)
-    return contributors
+    data = {"metadata": {"upload_type": pub.upload_type}}
+    if pub.upload_type == "publication":
+        data["metadata"].update({"publication_type": pub.publication_type})
+        logging.info("'publication_type' has been added to the json file.")
+    else:
+        logging.info("Upload type is not 'publication' so the publication_type will not be added to the json file.")
+    data["metadata"].update({"publication_date": pub.publication_date,
+                             "title": pub.title,
+                             "creators": [__get_creator(creator) for creator in pub.creators],
+                             "description": pub.description or "",
+                             "access_right": pub.access_right,
+                             "license": pub.license,
+                             "doi": "",
+                             "keywords": pub.keywords})
+    if pub.related_identifiers is not None:
+        data["metadata"].update({"related_identifiers": [{"relation": related_identifier.relation,
+                                                          "identifier": related_identifier.identifier,
+                                                          "resource_type": related_identifier.resource_type}
+                                                         for related_identifier in pub.related_identifiers]})
+        logging.info("'related_identifiers' have been added to json file.")
+    else:
+        logging.info("Metadata does not contain tag related_identifier, so the related_identifiers will not be added to the json file.")
+    data["metadata"].update({"contributors": [__get_contributor(contributor) for contributor in pub.contributors],
+                             "communities": [{"identifier": pub.community}],
+                             "conference_title": pub.conference_title,
+                             "conference_acronym": pub.conference_acronym,
+                             "conference_dates": pub.conference_dates,
+                             "conference_place": pub.conference_place,
+                             "conference_url": pub.conference_url})
+
+    return data
+
+
+def __get_creator(creator: records.Creator) -> dict:
+    creator_dict = {"name": creator.name}
+    if creator.affiliation is not None:
+        creator_dict.update({"affiliation": creator.affiliation})
+    else:
+        logging.info(f"Creator {creator.name} has no affiliation.")
+    if creator.orcid is not None:
+        creator_dict.update({"orcid": creator.orcid})
+    else:
+        logging.info(f"Creator {creator.name} has no orcid.")
+    return creator_dict
+
+
+def __get_contributor(contributor: records.Contributor) -> dict:
+    contributor_dict = {"name": contributor.name, "affiliation": contributor.affiliation}
+    if contributor.orcid is not None:
+        contributor_dict.update({"orcid": contributor.orcid})
+    else:
+        logging.info(f"Creator {contributor.name} has no orcid.")
+    contributor_dict.update({"type": contributor.type})
+    return contributor_dict
 
 
 def get_bundle_files(bundle: str):
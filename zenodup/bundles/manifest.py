@@ -0,0 +1,128 @@
+"""Manifest of created bundles for incremental rebuilds
+
+The manifest of a conference records for each bundle the source files
+(name, size, modification time and content hash) and a hash of the bundle's
+json metadata. A bundle only has to be rebuilt if one of them has changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+
+def load(manifest_file: str) -> dict:
+    """Returns manifest of previous run
+
+    Parameters
+    ----------
+    manifest_file : str
+        Path to manifest file
+
+    Returns
+    -------
+    manifest : dict
+        Dictionary with bundle names as keys and bundle entries as values.
+        Empty if manifest file doesn't exist or can't be read.
+    """
+
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)["bundles"]
+    except FileNotFoundError:
+        return {}
+    except (ValueError, KeyError):
+        logging.warning(f"Manifest file {manifest_file} can't be read. All bundles will be rebuilt.")
+        return {}
+
+
+def save(manifest: dict, manifest_file: str) -> None:
+    """Saves manifest
+
+    The manifest file is replaced atomically, so that an interrupted run
+    doesn't leave a truncated manifest file.
+
+    Parameters
+    ----------
+    manifest : dict
+        Dictionary with bundle names as keys and bundle entries as values
+    manifest_file : str
+        Path to manifest file
+    """
+
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({"bundles": manifest}, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+
+def get_bundle_entry(files: dict, data: dict, link_mode: str, previous: dict = None) -> dict:
+    """Returns manifest entry of bundle
+
+    Parameters
+    ----------
+    files : dict
+        Dictionary with file types (e.g. 'pdf') as keys and paths to source files as values
+    data : dict
+        Json metadata of bundle
+    link_mode : str
+        Mode to place the files in the bundle
+    previous : dict
+        Manifest entry of bundle from previous run. Content hashes of files with unchanged
+        size and modification time are taken from it instead of reading the files again.
+
+    Returns
+    -------
+    entry : dict
+        Manifest entry of bundle
+    """
+
+    previous = previous or {}
+    entry = {"metadata": hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest(),
+             "link_mode": link_mode}
+    for file_type, path in files.items():
+        entry.update({file_type: __get_file_entry(path, previous.get(file_type))})
+    return entry
+
+
+def changed(entry: dict, previous: dict) -> bool:
+    """Returns True if bundle has to be rebuilt
+
+    Modification times are ignored, files are compared by name and content hash.
+
+    Parameters
+    ----------
+    entry : dict
+        Manifest entry of bundle from current run
+    previous : dict
+        Manifest entry of bundle from previous run (None if bundle is new)
+    """
+
+    if not previous:
+        return True
+    return __comparable(entry) != __comparable(previous)
+
+
+# return entry without modification times and sizes
+def __comparable(entry: dict) -> dict:
+    return {key: (value["file"], value["sha256"]) if isinstance(value, dict) else value for key, value in entry.items()}
+
+
+# return name, size, modification time and content hash of file
+def __get_file_entry(path: str, previous: dict = None) -> dict:
+    stat = os.stat(path)
+    entry = {"file": os.path.basename(path), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+    if previous and all(previous.get(key) == value for key, value in entry.items()):
+        entry.update({"sha256": previous["sha256"]})
+    else:
+        entry.update({"sha256": __get_file_hash(path)})
+    return entry
+
+
+# return sha256 hash of file content
+def __get_file_hash(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
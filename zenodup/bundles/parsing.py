@@ -1,23 +1,31 @@
 """Module for parsing filenames and titles of abstracts
 """
 
+from functools import lru_cache
 import logging
 import os
 import re
-from xml.etree import ElementTree as ET
 
-from bundles import sanity
+# replacements of characters by '_' in ascii representation of titles and names (see __ascii_rename),
+# applied to the encoded name at once (bytes.translate is faster than str.translate with a dictionary)
+ASCII_RENAME = bytes.maketrans(b".-:,?! ()&@", b"_" * 11)
+NON_ASCII = re.compile(r'[^\x00-\x7f]')
+# prefix of filenames in conference tool exports
+FINAL_PREFIX = re.compile(r'[0-9]{3}_final-')
+# maximum number of cached results of each parsing function (more than the abstracts of a large conference),
+# so that the caches don't grow for the whole process, e.g. for a batch of many conferences
+CACHE_SIZE = 16384
 
 
-def get_bundle_names(abstract: ET.Element) -> dict:
+def get_bundle_names(abstract: 'records.Abstract') -> dict:
     """Returns a dictionary with possible bundle names
 
-    Parses title and creators of the abstract's metadata tag. 
+    Parses title and creators of the abstract's metadata tag (see get_candidate_names). 
 
     Parameters
     ----------
-    abstract : ET.Element
-        Metadata element of conference's metadata file
+    abstract : records.Abstract
+        Abstract from conference's metadata file
 
     Returns
     -------
@@ -26,17 +34,38 @@ def get_bundle_names(abstract: ET.Element) -> dict:
         list of possible filenames for corresponding abstract pdf file as value.
     """
 
-    bundle_names = {}
-    creator_names = [__parse_creator(creator.find("name").text) for creator in abstract.findall(".//creator")]
-    if len(creator_names) == 0:
-        logging.warning(f"The abstract with title {abstract.find('title').text} "
+    if len(abstract.creators) == 0:
+        logging.warning(f"The abstract with title {abstract.raw_title} "
                         f"(index) does not contain creators.")
-    try:
-        title = __ascii_rename(abstract.find("title").text)
-    except TypeError:
+    if abstract.raw_title is None:
         logging.warning(f"The following abstract does not contain a title:")
 
-    prefixes = [creator[0].upper()+'_'+creator[1]+'_' for creator in creator_names]
+    possible_names = get_candidate_names(abstract.raw_title, tuple(creator.name for creator in abstract.creators))
+    return {__ascii_rename(abstract.raw_title): list(possible_names)}
+
+@lru_cache(maxsize=CACHE_SIZE)
+def get_candidate_names(title: str, creators: tuple) -> tuple:
+    """Returns possible filenames of an abstract's files
+
+    The names are combinations of a prefix for each creator ('SURNAME_Forename_') and the title
+    in ascii representation (with variants for quotes, 'ss' and a double '_' after the prefix). 
+    The results of the most recent abstracts are cached (see CACHE_SIZE), e.g. for repeated runs of a conference.
+
+    Parameters
+    ----------
+    title : str
+        Title of abstract (raw title of metadata tag)
+    creators : tuple
+        Names of abstract's creators ('Surname, Forename')
+
+    Returns
+    -------
+    possible_names : tuple
+        Possible filenames, each name only once (at its last position, as names are compared from the end)
+    """
+
+    title = __ascii_rename(title)
+    prefixes = [__get_prefix(creator) for creator in creators]
     possible_names = [prefix + title for prefix in prefixes]
     # if '_em_' in title replace by '_' and add prefix + modified name to possible names 
     try:
@@ -53,9 +82,8 @@ def get_bundle_names(abstract: ET.Element) -> dict:
     for prefix in prefixes:
         possible_names.append(prefix + '_' + title)
 
-    bundle_names.update({title: possible_names})
-
-    return bundle_names
+    # keep last occurrence of each name
+    return tuple(reversed(dict.fromkeys(reversed(possible_names))))
 
 def get_comparable_filenames(files: list)-> dict:
     """Returns a dictionary with the conference's files without prefixes and extensions
@@ -74,7 +102,7 @@ def get_comparable_filenames(files: list)-> dict:
     # get file names
     names = [os.path.splitext(f)[0] for f in files]
     names.sort()
-    names_to_compare = {re.sub(r'[0-9]{3}_final-', '', name): name for name in names}
+    names_to_compare = {FINAL_PREFIX.sub('', name): name for name in names}
 
     return names_to_compare
 
@@ -94,7 +122,8 @@ def get_abstract_file(publication_names: dict, comparable_files: dict, index : i
     Returns
     -------
     abstract_file: str
-        Returns filename of matched file
+        Returns filename of matched file (the file with the given index if no filename matches, 
+        such assignments are verified by Conference with the titles of the xml files)
     """
 
     # find matching filename
@@ -118,25 +147,129 @@ def get_abstract_file(publication_names: dict, comparable_files: dict, index : i
     except UnboundLocalError:
         return list(comparable_files.values())[index]
 
+class FilenameIndex:
+    """Index of comparable filenames for assignment by name scheme
+
+    Builds a character trie of the conference's comparable filenames once, so that 
+    each abstract can be assigned without scanning all filenames again. The result 
+    of a lookup is the same as the result of get_abstract_file.
+
+    Methods
+    -------
+    get_abstract_file
+        Assigns file to abstract and returns filename.
+    find
+        Returns filename matching the possible names of an abstract.
+    """
+
+    def __init__(self, comparable_files: dict):
+        """Constructor of class FilenameIndex
+
+        Parameters
+        ----------
+        comparable_files: dict
+            Dictionary with modified filenames as keys and filenames as values
+        """
+
+        self.files = list(comparable_files.values())
+        self.__names = self.__build_trie(comparable_files.keys())
+        # filenames without last character (fallback if no filename matches)
+        self.__truncated_names = self.__build_trie(name[:-1] for name in comparable_files.keys())
+
+    def get_abstract_file(self, publication_names: dict, index: int) -> str:
+        """Assigns file to abstract and returns filename
+
+        Parameters
+        ----------
+        publication_names: dict
+            Dictionary with all possible names for one abstract
+        index: int
+            Index of metadata element to be assigned. If no file could be assigned to metadata by name 
+            comparison, the file with given index in list will be matched with metadata element.
+
+        Returns
+        -------
+        abstract_file: str
+            Returns filename of matched file (the file with the given index if no filename matches)
+        """
+
+        abstract_file = self.find(publication_names)
+        # if no matching filename has been found return file with metadata elements index
+        if abstract_file is None:
+            return self.files[index]
+        return abstract_file
+
+    def find(self, publication_names: dict):
+        """Returns filename matching the possible names of an abstract
+
+        Parameters
+        ----------
+        publication_names: dict
+            Dictionary with all possible names for one abstract
+
+        Returns
+        -------
+        abstract_file: str
+            Returns filename of matched file (None if no filename matches)
+        """
+
+        abstract_file = None
+        for elem in publication_names:
+            position = self.__find(self.__names, publication_names.get(elem))
+            if position is None:
+                position = self.__find(self.__truncated_names, publication_names.get(elem))
+            if position is not None:
+                abstract_file = self.files[position]
+        return abstract_file
+
+    # build trie with position of filename (in order of comparable filenames) as leaf value
+    @staticmethod
+    def __build_trie(names) -> dict:
+        trie = {}
+        for position, name in enumerate(names):
+            node = trie
+            for char in name:
+                node = node.setdefault(char, {})
+            node[None] = position
+        return trie
+
+    # return position of last filename contained in last possible name containing any filename
+    @staticmethod
+    def __find(trie: dict, possible_names: list):
+        for possible_name in reversed(possible_names):
+            position = -1
+            for start in range(len(possible_name) + 1):
+                node = trie
+                for char in possible_name[start:]:
+                    position = max(position, node.get(None, -1))
+                    node = node.get(char)
+                    if node is None:
+                        break
+                else:
+                    position = max(position, node.get(None, -1))
+            if position != -1:
+                return position
+        return None
+
 # return string representation of creator
 def __parse_creator(name: str) -> list:
     name = [__ascii_rename(elem.strip()) for elem in name.split(",")]
     return name
 
+# return prefix of filenames for creator
+@lru_cache(maxsize=CACHE_SIZE)
+def __get_prefix(name: str) -> str:
+    creator = __parse_creator(name)
+    return creator[0].upper() + '_' + creator[1] + '_'
+
 # get ascii representation of string
+@lru_cache(maxsize=CACHE_SIZE)
 def __ascii_rename(name: str) -> str:
     try:
-        elements_to_be_replaced = [".", "-", ":", ",", "?", "!", " ", "(", ")", "&", "@"]
-        name = name.replace("ß", "ss")
-        name = name.replace("\"", "_em_")
-        name = name.replace("\'", "_em_")
-        for char in elements_to_be_replaced:
-            name = name.replace(char, "_")
-        try:
-            name.encode("ascii")
-        except:
-            # if name contains non ascii
-            name = ''.join([i if ord(i) < 128 else '_' for i in name])
-        return name
+        name = name.replace("ß", "ss").replace("\"", "_em_").replace("\'", "_em_")
+        # if name contains non ascii
+        if not name.isascii():
+            name = NON_ASCII.sub('_', name)
+        return name.encode("ascii").translate(ASCII_RENAME).decode("ascii")
     except AttributeError:
         pass
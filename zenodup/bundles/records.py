@@ -0,0 +1,308 @@
+"""Module to read the abstracts' metadata from metadata files
+
+The metadata files are parsed incrementally. Each metadata element is turned
+into a compact record (see Abstract) and cleared afterwards, so that the memory 
+used for the element tree doesn't grow with the size of the metadata file.
+"""
+
+from xml.etree import ElementTree as ET
+
+
+def iter_elements(metadata_file: str, tag: str = "metadata"):
+    """Yields metadata elements of metadata file
+
+    Only direct children of the root element with given tag are yielded.
+    Each element is cleared as soon as the next element is requested, so it
+    must be processed (or copied) before.
+
+    Parameters
+    ----------
+    metadata_file : str
+        Path to metadata file
+    tag : str
+        Tag of metadata elements (Default: 'metadata')
+
+    Yields
+    ------
+    element : ET.Element
+        Metadata element
+    """
+
+    for _, elem in __iter_children(metadata_file):
+        if elem.tag == tag:
+            yield elem
+
+
+def iter_abstracts(metadata_file: str, tag: str = "metadata"):
+    """Yields abstracts of metadata file
+
+    Parameters
+    ----------
+    metadata_file : str
+        Path to metadata file
+    tag : str
+        Tag of metadata elements (Default: 'metadata')
+
+    Yields
+    ------
+    abstract : Abstract
+        Abstract parsed from metadata element
+    """
+
+    for elem in iter_elements(metadata_file, tag):
+        yield Abstract.from_element(elem)
+
+
+def load_abstracts(metadata_file: str, tag: str = "metadata") -> list:
+    """Returns list of abstracts of metadata file
+
+    See iter_abstracts.
+    """
+
+    return list(iter_abstracts(metadata_file, tag))
+
+
+class Creator:
+    """Creator of an abstract
+
+    Attributes
+    ----------
+    name : str
+        Name of creator ("Last name, First name")
+    affiliation : str
+        Affiliation of creator (None if not given)
+    orcid : str
+        ORCID of creator (None if not given)
+    """
+
+    __slots__ = ("name", "affiliation", "orcid")
+
+    def __init__(self, name: str, affiliation: str = None, orcid: str = None):
+        self.name = name
+        self.affiliation = affiliation
+        self.orcid = orcid
+
+    @classmethod
+    def from_element(cls, elem: ET.Element) -> 'Creator':
+        children = _children(elem)
+        return cls(_strip(children.get("name")), _collapse(children.get("affiliation")), _strip(children.get("orcid")))
+
+
+class Contributor:
+    """Contributor of an abstract (e.g. editor)
+
+    Attributes
+    ----------
+    name : str
+        Name of contributor ("Last name, First name")
+    affiliation : str
+        Affiliation of contributor
+    orcid : str
+        ORCID of contributor (None if not given)
+    type : str
+        Type of contribution (e.g. 'Editor')
+    """
+
+    __slots__ = ("name", "affiliation", "orcid", "type")
+
+    def __init__(self, name: str, affiliation: str = None, orcid: str = None, type: str = None):
+        self.name = name
+        self.affiliation = affiliation
+        self.orcid = orcid
+        self.type = type
+
+    @classmethod
+    def from_element(cls, elem: ET.Element) -> 'Contributor':
+        children = _children(elem)
+        return cls(_strip(children.get("name")), _collapse(children.get("affiliation")),
+                   _strip(children.get("orcid")), _strip(children.get("type")))
+
+
+class RelatedIdentifier:
+    """Related identifier of an abstract
+
+    Attributes
+    ----------
+    relation : str
+        Relation to identifier (e.g. 'isPartOf')
+    identifier : str
+        Identifier (e.g. DOI)
+    resource_type : str
+        Resource type of identifier (e.g. 'publication-book')
+    """
+
+    __slots__ = ("relation", "identifier", "resource_type")
+
+    def __init__(self, relation: str, identifier: str, resource_type: str):
+        self.relation = relation
+        self.identifier = identifier
+        self.resource_type = resource_type
+
+    @classmethod
+    def from_element(cls, elem: ET.Element) -> 'RelatedIdentifier':
+        children = _children(elem)
+        return cls(_strip(children.get("relation")), _strip(children.get("identifier")),
+                   _strip(children.get("resource_type")))
+
+
+class Abstract:
+    """Abstract's metadata from conference's metadata file
+
+    The texts are normalized once when the metadata element is parsed:
+    newlines are removed and titles, descriptions and affiliations consist 
+    of single spaces only. Missing tags are None.
+
+    Attributes
+    ----------
+    raw_title : str
+        Title as given in metadata file (used to assign files by name scheme)
+    title : str
+        Normalized title
+    upload_type, publication_type, publication_date, description, access_right, license : str
+        Zenodo metadata of abstract
+    keywords : list
+        List of keywords
+    creators : list
+        List of creators (see Creator)
+    contributors : list
+        List of contributors (see Contributor)
+    related_identifiers : list
+        List of related identifiers (see RelatedIdentifier), 
+        None if metadata element doesn't contain related identifiers
+    community : str
+        Identifier of Zenodo community
+    conference_title, conference_acronym, conference_dates, conference_place, conference_url : str
+        Zenodo metadata of conference
+    """
+
+    __slots__ = ("raw_title", "title", "upload_type", "publication_type", "publication_date", "description",
+                 "access_right", "license", "keywords", "creators", "contributors", "related_identifiers",
+                 "community", "conference_title", "conference_acronym", "conference_dates", "conference_place",
+                 "conference_url")
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field))
+
+    @classmethod
+    def from_element(cls, elem: ET.Element) -> 'Abstract':
+        """Returns abstract parsed from metadata element
+
+        Parameters
+        ----------
+        elem : ET.Element
+            Metadata element of metadata file
+        """
+
+        children = _children(elem)
+        related_identifiers = children.get("related_identifiers")
+        communities = children.get("communities")
+        keywords = _strip(children.get("keywords"))
+        return cls(raw_title=children["title"].text if "title" in children else None,
+                   title=_collapse(children.get("title")),
+                   upload_type=_strip(children.get("upload_type")),
+                   publication_type=_text(children.get("publication_type")),
+                   publication_date=_strip(children.get("publication_date")),
+                   description=_collapse(children.get("description")),
+                   access_right=_strip(children.get("access_right")),
+                   license=_strip(children.get("license")),
+                   keywords=[' '.join(keyword.replace("\"", "").split()) for keyword in keywords.split(", ")] if keywords is not None else None,
+                   creators=[Creator.from_element(creator) for creator in elem.findall("creators/creator")],
+                   contributors=[Contributor.from_element(contributor) for contributor in elem.findall("contributors/contributor")],
+                   related_identifiers=[RelatedIdentifier.from_element(related_identifier) for related_identifier in related_identifiers.findall("related_identifier")]
+                   if related_identifiers is not None and len(related_identifiers) else None,
+                   community=_text(communities.find("identifier")) if communities is not None else None,
+                   conference_title=_collapse(children.get("conference_title")),
+                   conference_acronym=_strip(children.get("conference_acronym")),
+                   conference_dates=_strip(children.get("conference_dates")),
+                   conference_place=_strip(children.get("conference_place")),
+                   conference_url=_strip(children.get("conference_url")))
+
+
+def rewrite(metadata_file: str, target_file: str, modify, tag: str = "metadata") -> None:
+    """Writes metadata file with modified metadata elements
+
+    The metadata elements are streamed from the metadata file to the
+    target file, so that the whole tree doesn't need to be in memory.
+
+    Parameters
+    ----------
+    metadata_file : str
+        Path to metadata file
+    target_file : str
+        Path to modified metadata file
+    modify : callable
+        Function which is called with each metadata element in order to modify it
+    tag : str
+        Tag of metadata elements (Default: 'metadata')
+    """
+
+    with open(target_file, 'wb') as target:
+        root = None
+        for root, elem in __iter_children(metadata_file):
+            if not target.tell():
+                __write_start(target, root)
+            if elem.tag == tag:
+                modify(elem)
+            target.write(ET.tostring(elem))
+        if root is None:
+            # metadata file without children
+            root = ET.parse(metadata_file).getroot()
+            __write_start(target, root)
+        target.write(f"</{root.tag}>".encode("us-ascii", "xmlcharrefreplace"))
+
+
+# yield root and its children, clear each child after it has been processed
+def __iter_children(metadata_file: str):
+    depth = 0
+    root = None
+    # children are yielded when the next tag has been parsed, so that their tail is complete
+    pending = None
+    for event, elem in ET.iterparse(metadata_file, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = elem
+        else:
+            depth -= 1
+        if pending is not None and (depth == 2 and event == "start" or depth == 0):
+            yield root, pending
+            # free memory of processed element
+            pending.clear()
+            root.remove(pending)
+            pending = None
+        if depth == 1 and event == "end":
+            pending = elem
+
+
+# write start tag and text of root element
+def __write_start(target, root: ET.Element) -> None:
+    start = ET.tostring(ET.Element(root.tag, root.attrib), short_empty_elements=False).decode("us-ascii")
+    target.write(start[:-len(f"</{root.tag}>")].encode("us-ascii"))
+    if root.text:
+        target.write(root.text.encode("us-ascii", "xmlcharrefreplace"))
+
+
+# return first child of element for each tag (helpers with single underscore, as they are used in class bodies)
+def _children(elem: ET.Element) -> dict:
+    children = {}
+    for child in elem:
+        children.setdefault(child.tag, child)
+    return children
+
+
+# return text of element (None if element doesn't exist)
+def _text(elem: ET.Element):
+    return elem.text if elem is not None else None
+
+
+# return text of element without newlines
+def _strip(elem: ET.Element):
+    text = _text(elem)
+    return text.replace("\n", "") if text is not None else None
+
+
+# return text of element without newlines and with single spaces
+def _collapse(elem: ET.Element):
+    text = _strip(elem)
+    return ' '.join(text.split()) if text is not None else None
@@ -6,15 +6,59 @@ import os
 
 import bundles
 
-def directory(d: str) -> None:
+
+class DirectorySnapshot:
+    """Listing of a directory
+
+    The directory is scanned once, so that all checks and 
+    assignments of a run can use the same listing.
+
+    Attributes
+    ----------
+    path : str
+        Path to directory
+    names : list
+        Names of all entries of directory (in order of directory listing)
+    files : list
+        Sorted names of entries without .DS_Store
+    directories : list
+        Names of subdirectories (in order of directory listing)
+    """
+
+    def __init__(self, path: str):
+        """Constructor of class DirectorySnapshot
+
+        Parameters
+        ----------
+        path : str
+            Path to directory to be scanned
+        """
+
+        self.path = path
+        self.names = []
+        self.directories = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                self.names.append(entry.name)
+                if entry.is_dir():
+                    self.directories.append(entry.name)
+        self.files = sorted(name for name in self.names if name != ".DS_Store")
+
+    def stems(self) -> list:
+        """Returns names of entries without extensions and .DS_Store (in order of directory listing)"""
+
+        return [os.path.splitext(name)[0] for name in self.names if name != ".DS_Store"]
+
+
+def directory(d) -> None:
     """Checks if directory contains multiple file types
 
     Ignores .DS_Store.
 
     Parameters
     ----------
-    d : str
-        Path to directory checking file types
+    d : str or DirectorySnapshot
+        Path to directory or listing of directory checking file types
 
     Raises
     ------
@@ -22,9 +66,11 @@ def directory(d: str) -> None:
         If the given directory contains multiple file types.
     """
 
-    types = set([os.path.splitext(f)[1] for f in os.listdir(d) if f != ".DS_Store"])
+    if not isinstance(d, DirectorySnapshot):
+        d = DirectorySnapshot(d)
+    types = set([os.path.splitext(f)[1] for f in d.files])
     if len(types) > 1:
-        logging.warning(f"The given directory {d} contains files with multiple formats: {types}")
+        logging.warning(f"The given directory {d.path} contains files with multiple formats: {types}")
         raise Exception("The given directory contains files with multiple formats.")
 
 def filenames(conf: 'bundles.Conference') -> None:
@@ -44,11 +90,12 @@ def filenames(conf: 'bundles.Conference') -> None:
         If directories contain different filenames.
     """
 
-    pdf_names = [os.path.splitext(f)[0] for f in os.listdir(conf.pdf) if f != ".DS_Store"]
-    xml_names = [os.path.splitext(f)[0]  for f in os.listdir(conf.xml) if f != ".DS_Store"]
+    pdf_names = conf.pdf_files.stems()
+    xml_names = conf.xml_files.stems()
 
-    missing_xmls = [f for f in pdf_names if f not in xml_names]
-    missing_pdfs = [f for f in xml_names if f not in pdf_names]
+    pdf_set, xml_set = set(pdf_names), set(xml_names)
+    missing_xmls = [f for f in pdf_names if f not in xml_set]
+    missing_pdfs = [f for f in xml_names if f not in pdf_set]
 
     if len(missing_xmls) != 0 or len(missing_pdfs) != 0:
         logging.warning(f"For the following pdf files exists no matching xml file: {missing_xmls}. For the following xml files exists no matching pdf file: {missing_pdfs}. Please check.")
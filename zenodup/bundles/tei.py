@@ -0,0 +1,154 @@
+"""Index of the TEI files of a bundle structure
+
+The index maps the names of the TEI files in a conference's bundle structure
+to their paths and to the information needed for the annual package (xml:id
+and subcategory). The files are read once in parallel and the index is cached,
+so that only new or changed files are read again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+from lxml import etree
+import os
+
+TEI = "{http://www.tei-c.org/ns/1.0}"
+XML_ID = "{http://www.w3.org/XML/1998/namespace}id"
+
+
+class TeiIndex:
+    """Index of TEI files of a bundle structure
+
+    Attributes
+    ----------
+    bundle_base : str
+        Path to conference's bundle structure
+    cache_file : str
+        Path to cache file of index (None if index isn't cached)
+    entries : dict
+        Dictionary with file names as keys and index entries as values. An index entry contains
+        path, size and modification time of the file, its xml:id and its subcategory ('format').
+    """
+
+    def __init__(self, bundle_base: str, cache_file: str = None, jobs: int = None) -> None:
+        """Constructor of TeiIndex class
+
+        Parameters
+        ----------
+        bundle_base : str
+            Path to conference's bundle structure
+        cache_file : str
+            Path to cache file of index (Default: None)
+        jobs : int
+            Number of files read at the same time (Default: number of threads chosen by ThreadPoolExecutor)
+        """
+
+        self.bundle_base = bundle_base
+        self.cache_file = cache_file
+        cached = self.__load()
+
+        # get xml files of bundle structure
+        paths = {}
+        for directory, _, files in os.walk(bundle_base):
+            for f in files:
+                if f.endswith(".xml"):
+                    paths[f] = os.path.join(directory, f)
+
+        # read new and changed files
+        self.entries = {}
+        changed = []
+        for file_name, path in paths.items():
+            stat = os.stat(path)
+            entry = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+            previous = cached.get(file_name)
+            if previous and all(previous.get(key) == value for key, value in entry.items()):
+                self.entries[file_name] = previous
+            else:
+                self.entries[file_name] = entry
+                changed.append(file_name)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            for file_name, header in zip(changed, executor.map(read_header, [paths[f] for f in changed])):
+                self.entries[file_name].update(header)
+        logging.info(f"TEI index of {bundle_base}: {len(changed)} of {len(self.entries)} files have been read.")
+
+        if cache_file and (changed or len(cached) != len(self.entries)):
+            self.__save()
+
+    def get(self, file_name: str) -> dict:
+        """Returns index entry of TEI file
+
+        Parameters
+        ----------
+        file_name : str
+            Name of TEI file
+
+        Returns
+        -------
+        entry : dict
+            Index entry with keys 'path', 'xml_id' and 'format' (None if file isn't part of bundle structure).
+            'xml_id' is None if file has no xml:id or its category tags are incomplete.
+        """
+
+        return self.entries.get(file_name)
+
+    # read cached index
+    def __load(self) -> dict:
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning(f"TEI index {self.cache_file} can't be read. All files will be read again.")
+            return {}
+
+    # save index (replaced atomically)
+    def __save(self) -> None:
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+
+
+def read_header(xml_file: str) -> dict:
+    """Returns xml:id and subcategory of TEI file
+
+    Only the teiHeader is parsed, the text of the TEI file is skipped.
+
+    Parameters
+    ----------
+    xml_file : str
+        Path to TEI file
+
+    Returns
+    -------
+    header : dict
+        Dictionary with keys 'xml_id' and 'format'. 'xml_id' is None if file has no xml:id
+        or contains keywords tags without attribute 'n', 'format' is None if file has no subcategory.
+    """
+
+    header = {"xml_id": None, "format": None}
+    xml_id = None
+    try:
+        for event, elem in etree.iterparse(xml_file, events=("start", "end")):
+            if event == "start":
+                if xml_id is None:
+                    # root element
+                    xml_id = elem.attrib.get(XML_ID, "")
+                continue
+            if elem.tag == TEI + "keywords":
+                n = elem.attrib.get("n")
+                if n is None:
+                    return header
+                if n == "subcategory":
+                    term = elem.find(TEI + "term")
+                    header["format"] = term.text if term is not None else None
+            elif elem.tag == TEI + "teiHeader":
+                break
+    except etree.XMLSyntaxError as error:
+        logging.warning(f"TEI file {xml_file} can't be parsed: {error}")
+        return header
+    header["xml_id"] = xml_id or None
+    return header
@@ -0,0 +1,338 @@
+"""Module for matching titles of abstracts
+
+Titles are compared in a normalized form (Unicode NFKC, casefolded, umlauts
+and diacritics folded, hyphenation, punctuation and whitespace removed), so that
+typographic differences (quotes, dashes, line breaks, encodings of umlauts) don't
+prevent a match. The TitleIndex finds equal normalized titles by dictionary lookup
+and similar titles by an index of their character n-grams, scored with the Dice
+coefficient of the n-grams. Titles of two lists can be assigned to each other with
+maximum total similarity (assign_titles).
+"""
+
+import math
+import re
+import unicodedata
+
+# umlauts are folded like in transliterations (e.g. 'Mädchen' and 'Maedchen')
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+
+# escaped line breaks (e.g. in titles of Zenodo's metadata)
+ESCAPED_LINE_BREAK = re.compile(r"\\n")
+
+
+def normalize(title: str) -> str:
+    """Returns normalized title
+
+    Parameters
+    ----------
+    title : str
+        Title of abstract
+
+    Returns
+    -------
+    normalized_title : str
+        Casefolded title with folded umlauts and diacritics, containing only letters and digits
+        (empty string if title is None)
+    """
+
+    if not title:
+        return ""
+    title = ESCAPED_LINE_BREAK.sub("", title)
+    title = unicodedata.normalize("NFKC", title).casefold().translate(UMLAUTS)
+    return "".join(char for char in unicodedata.normalize("NFKD", title) if char.isalnum())
+
+
+def get_ngrams(normalized_title: str, n: int = 3) -> set:
+    """Returns character n-grams of normalized title
+
+    Parameters
+    ----------
+    normalized_title : str
+        Title normalized by normalize
+    n : int
+        Length of n-grams (Default: 3)
+
+    Returns
+    -------
+    ngrams : set
+        Set of n-grams (title itself if it is shorter than n)
+    """
+
+    if len(normalized_title) <= n:
+        return {normalized_title} if normalized_title else set()
+    return {normalized_title[i:i + n] for i in range(len(normalized_title) - n + 1)}
+
+
+def similarity(title: str, other_title: str) -> float:
+    """Returns similarity of two titles
+
+    Parameters
+    ----------
+    title : str
+        Title of abstract
+    other_title : str
+        Title to compare with
+
+    Returns
+    -------
+    similarity : float
+        Dice coefficient of the n-grams of the normalized titles
+        (1.0 if the normalized titles are equal, 0.0 if they have no n-gram in common)
+    """
+
+    title, other_title = normalize(title), normalize(other_title)
+    if title == other_title:
+        return 1.0
+    return _dice(get_ngrams(title), get_ngrams(other_title))
+
+
+def similarity_matrix(titles: list, other_titles: list) -> list:
+    """Returns similarities of all pairs of titles
+
+    Parameters
+    ----------
+    titles : list
+        Titles of abstracts (rows)
+    other_titles : list
+        Titles to compare with (columns)
+
+    Returns
+    -------
+    similarities : list
+        List of rows with the similarity (see similarity) of each title to each of other_titles
+    """
+
+    # normalize each title once
+    normalized = [normalize(title) for title in titles]
+    other_normalized = [normalize(title) for title in other_titles]
+    other_ngrams = [get_ngrams(title) for title in other_normalized]
+    matrix = []
+    for title in normalized:
+        ngrams = get_ngrams(title)
+        matrix.append([1.0 if title == other_title else _dice(ngrams, other_ngrams[column])
+                       for column, other_title in enumerate(other_normalized)])
+    return matrix
+
+
+def optimal_assignment(scores: list) -> list:
+    """Returns assignment of rows to columns with maximum total score
+
+    Solves the assignment problem with the Hungarian algorithm (shortest augmenting paths
+    with potentials, O(rows² * columns)).
+
+    Parameters
+    ----------
+    scores : list
+        List of rows with a score for each column (e.g. see similarity_matrix),
+        the number of rows must not exceed the number of columns
+
+    Returns
+    -------
+    assignment : list
+        Column assigned to each row (each column is assigned at most once)
+
+    Raises
+    ------
+    ValueError
+        If there are more rows than columns.
+    """
+
+    rows = len(scores)
+    if rows == 0:
+        return []
+    columns = len(scores[0])
+    if rows > columns:
+        raise ValueError(f"Can't assign {rows} rows to {columns} columns.")
+
+    # potentials of rows (u) and columns (v), row assigned to column (p, 1-based, 0 if none)
+    # and previous column on the augmenting path (way), column 0 is the augmenting path's root
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    p = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+    for row in range(1, rows + 1):
+        p[0] = row
+        j0 = 0
+        minv = [math.inf] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row_scores = scores[i0 - 1]
+            ui0 = u[i0]
+            delta = math.inf
+            j1 = 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    # maximize score by minimizing its negation
+                    cost = -row_scores[j - 1] - ui0 - v[j]
+                    if cost < minv[j]:
+                        minv[j] = cost
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # augment along path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    assignment = [None] * rows
+    for column in range(1, columns + 1):
+        if p[column]:
+            assignment[p[column] - 1] = column - 1
+    return assignment
+
+
+def assign_titles(titles: list, other_titles: list) -> list:
+    """Returns assignment of titles to other titles with maximum total similarity
+
+    Titles with a unique equal title among the other titles (in normalized form) are assigned to it
+    directly, the remaining titles by optimal_assignment of their similarity_matrix.
+
+    Parameters
+    ----------
+    titles : list
+        Titles of abstracts
+    other_titles : list
+        Titles to assign to (at least as many as titles)
+
+    Returns
+    -------
+    assignment : list
+        Tuple of position in other_titles and similarity for each title
+    """
+
+    normalized = [normalize(title) for title in titles]
+    columns = {}
+    for column, title in enumerate(other_titles):
+        columns.setdefault(normalize(title), []).append(column)
+    rows = {}
+    for row, title in enumerate(normalized):
+        rows.setdefault(title, []).append(row)
+
+    assignment = [None] * len(titles)
+    for title, title_rows in rows.items():
+        if len(title_rows) == 1 and len(columns.get(title, [])) == 1:
+            assignment[title_rows[0]] = (columns[title][0], 1.0)
+
+    # assign remaining titles to remaining other titles
+    assigned = set(match[0] for match in assignment if match is not None)
+    remaining_rows = [row for row, match in enumerate(assignment) if match is None]
+    remaining_columns = [column for column in range(len(other_titles)) if column not in assigned]
+    matrix = similarity_matrix([titles[row] for row in remaining_rows], [other_titles[column] for column in remaining_columns])
+    for position, column in enumerate(optimal_assignment(matrix)):
+        assignment[remaining_rows[position]] = (remaining_columns[column], matrix[position][column])
+    return assignment
+
+
+class TitleIndex:
+    """Index of titles for exact and fuzzy matching
+
+    Equal normalized titles are found by dictionary lookup. Candidates for similar titles
+    are the titles sharing one of the query's rarest n-grams: a title whose Dice coefficient
+    reaches min_score shares enough n-grams with the query to contain one of them
+    (prefix filtering), so only these candidates are scored.
+
+    Attributes
+    ----------
+    titles : list
+        Indexed titles
+    min_score : float
+        Minimum similarity of candidates returned by match
+    """
+
+    def __init__(self, titles: list, min_score: float = 0.5, n: int = 3) -> None:
+        """Constructor of TitleIndex class
+
+        Parameters
+        ----------
+        titles : list
+            Titles to be indexed
+        min_score : float
+            Minimum similarity of candidates returned by match (Default: 0.5)
+        n : int
+            Length of n-grams (Default: 3)
+        """
+
+        self.titles = list(titles)
+        self.min_score = min_score
+        self.__n = n
+        self.__exact = {}
+        self.__ngrams = []
+        self.__postings = {}
+        for position, title in enumerate(self.titles):
+            normalized_title = normalize(title)
+            # first title wins, like in lookups of a list
+            self.__exact.setdefault(normalized_title, position)
+            ngrams = get_ngrams(normalized_title, n)
+            self.__ngrams.append(ngrams)
+            for ngram in ngrams:
+                self.__postings.setdefault(ngram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def match(self, title: str, min_score: float = None) -> dict:
+        """Returns best match of title in index
+
+        Parameters
+        ----------
+        title : str
+            Title to be matched
+        min_score : float
+            Minimum similarity of returned match (Default: None, min_score of index)
+
+        Returns
+        -------
+        match : dict
+            Dictionary with position of matched title in index ('position', None if no indexed title
+            reaches min_score), its similarity ('score') and whether the normalized titles are equal ('exact')
+        """
+
+        min_score = self.min_score if min_score is None else min_score
+        normalized_title = normalize(title)
+        position = self.__exact.get(normalized_title)
+        if position is not None:
+            return {"position": position, "score": 1.0, "exact": True}
+
+        best = {"position": None, "score": 0.0, "exact": False}
+        ngrams = get_ngrams(normalized_title, self.__n)
+        if not ngrams or min_score <= 0:
+            return best
+
+        # candidates share at least one of the rarest ngrams (ngrams missing in index can't be shared)
+        # and have a number of ngrams allowing the minimum similarity
+        overlap = math.ceil(min_score * len(ngrams) / (2 - min_score))
+        prefix = sorted(ngrams, key=lambda ngram: len(self.__postings.get(ngram, ())))[:len(ngrams) - overlap + 1]
+        lower, upper = len(ngrams) * min_score / (2 - min_score), len(ngrams) * (2 - min_score) / min_score
+        candidates = set()
+        for ngram in prefix:
+            candidates.update(self.__postings.get(ngram, ()))
+
+        for candidate in sorted(candidates):
+            if not lower <= len(self.__ngrams[candidate]) <= upper:
+                continue
+            score = _dice(ngrams, self.__ngrams[candidate])
+            if score > best["score"]:
+                best = {"position": candidate, "score": score, "exact": False}
+        if best["score"] < min_score:
+            best["position"] = None
+        return best
+
+
+# return dice coefficient of two sets (single underscore, as it is used in class bodies)
+def _dice(ngrams: set, other_ngrams: set) -> float:
+    if not ngrams or not other_ngrams:
+        return 0.0
+    return 2 * len(ngrams & other_ngrams) / (len(ngrams) + len(other_ngrams))
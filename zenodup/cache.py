@@ -0,0 +1,149 @@
+"""Cache of responses of Zenodo API
+
+The cache stores the json responses for depositions (and their files)
+together with their ETag and Last-Modified headers in a SQLite database.
+Cached responses are revalidated with conditional requests, so that
+unchanged depositions aren't downloaded again. Responses which haven't
+been stored or revalidated for a given time (ttl) expire: they are neither
+served (e.g. in offline mode) nor revalidated and are evicted. The least
+recently used responses are evicted if the cache exceeds its maximum size.
+"""
+
+import json
+import logging
+import sqlite3
+import time
+
+
+class ResponseCache:
+    """Cache of json responses of Zenodo API
+
+    Attributes
+    ----------
+    cache_file : str
+        Path to SQLite database of cache
+
+    ttl : float
+        Time in seconds after which responses expire, unless they have been revalidated
+
+    max_size : int
+        Maximum size of cached responses in bytes
+    """
+
+    def __init__(self, cache_file: str, ttl: float = 30 * 24 * 3600, max_size: int = 500 * 1024 * 1024) -> None:
+        """Constructor of ResponseCache class
+
+        Parameters
+        ----------
+        cache_file : str
+            Path to SQLite database of cache
+        ttl : float
+            Time in seconds after which responses expire, unless they have been revalidated (Default: 30 days)
+        max_size : int
+            Maximum size of cached responses in bytes (Default: 500 MB)
+        """
+
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_size = max_size
+        self.__db = sqlite3.connect(cache_file)
+        self.__db.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, body BLOB, etag TEXT, "
+                          "last_modified TEXT, used REAL, size INTEGER, validated REAL)")
+        columns = [row[1] for row in self.__db.execute("PRAGMA table_info(responses)")]
+        if "validated" not in columns:
+            # cache of previous version, its responses are expired
+            with self.__db:
+                self.__db.execute("ALTER TABLE responses ADD COLUMN validated REAL DEFAULT 0")
+
+    def __enter__(self) -> 'ResponseCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get(self, url: str):
+        """Returns cached response for url (unless it has expired) and marks it as used
+
+        Parameters
+        ----------
+        url : str
+            URL of request (without parameters)
+
+        Returns
+        -------
+        data, headers : tuple
+            Json data of cached response and headers for a conditional request to revalidate it
+            (None, {} if no response is cached for url or the cached response has expired)
+        """
+
+        now = time.time()
+        row = self.__db.execute("SELECT body, etag, last_modified FROM responses WHERE url = ? AND validated >= ?",
+                                (url, now - self.ttl)).fetchone()
+        if row is None:
+            return None, {}
+        with self.__db:
+            self.__db.execute("UPDATE responses SET used = ? WHERE url = ?", (now, url))
+        headers = {}
+        if row[1]:
+            headers.update({"If-None-Match": row[1]})
+        if row[2]:
+            headers.update({"If-Modified-Since": row[2]})
+        return json.loads(row[0]), headers
+
+    def store(self, url: str, data, etag: str = None, last_modified: str = None) -> None:
+        """Stores response for url
+
+        Parameters
+        ----------
+        url : str
+            URL of request (without parameters)
+        data : dict or list
+            Json data of response
+        etag : str
+            ETag header of response
+        last_modified : str
+            Last-Modified header of response
+        """
+
+        body = json.dumps(data).encode("utf-8")
+        now = time.time()
+        with self.__db:
+            self.__db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (url, body, etag, last_modified, now, len(body), now))
+
+    def touch(self, url: str) -> None:
+        """Marks cached response for url as revalidated (not modified), its expiry starts again
+
+        Parameters
+        ----------
+        url : str
+            URL of request (without parameters)
+        """
+
+        now = time.time()
+        with self.__db:
+            self.__db.execute("UPDATE responses SET used = ?, validated = ? WHERE url = ?", (now, now, url))
+
+    def invalidate(self, url: str) -> None:
+        """Removes cached response for url (e.g. after deposition has been modified)
+
+        Parameters
+        ----------
+        url : str
+            URL of request (without parameters)
+        """
+
+        with self.__db:
+            self.__db.execute("DELETE FROM responses WHERE url = ?", (url,))
+
+    def close(self) -> None:
+        """Evicts expired and least recently used responses and closes cache"""
+
+        with self.__db:
+            expired = self.__db.execute("DELETE FROM responses WHERE validated < ?", (time.time() - self.ttl,)).rowcount
+            evicted = self.__db.execute("DELETE FROM responses WHERE url IN (SELECT url FROM (SELECT url, SUM(size) "
+                                        "OVER (ORDER BY used DESC, url) AS total FROM responses) WHERE total > ?)",
+                                        (self.max_size,)).rowcount
+        if expired or evicted:
+            logging.info(f"Response cache: {expired} expired and {evicted} least recently used responses have been evicted.")
+        self.__db.close()
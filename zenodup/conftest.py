@@ -0,0 +1,46 @@
+"""Fixtures of tests (run from ``zenodup/``, as config.yml is read from the working directory)"""
+
+import os
+
+import pytest
+
+import api
+import bundles
+from benchmarks import synthetic
+from benchmarks.end_to_end import DIRECTORIES
+from benchmarks.fake_zenodo import FakeZenodo
+
+
+@pytest.fixture
+def zenodo(request):
+    """Local stand-in for Zenodo's deposition API (see benchmarks.fake_zenodo)
+
+    Arguments of FakeZenodo can be passed by indirect parametrization, e.g.
+    ``@pytest.mark.parametrize("zenodo", [{"latency": 0.5}], indirect=True)``.
+    """
+
+    with FakeZenodo(**getattr(request, "param", {})) as server:
+        yield server
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Temporary working directory, the working directories of config.yml are redirected to it"""
+
+    for key, path in DIRECTORIES.items():
+        os.makedirs(tmp_path / path, exist_ok=True)
+        for config in [bundles.config, api.config]:
+            monkeypatch.setitem(config, key, os.path.join(str(tmp_path), path))
+    # requests to local stand-in are only limited by its rate limit headers
+    monkeypatch.setitem(api.config, 'api_rate_limit', 1000000)
+    monkeypatch.setitem(api.config, 'api_base_url', None)
+    return tmp_path
+
+
+@pytest.fixture
+def conference(workdir):
+    """Name of small synthetic conference (metadata file 'metadata.xml', pdf and TEI files) in input directory"""
+
+    name = "syn"
+    synthetic.write_conference(os.path.join(bundles.config["input_base"], name), 5)
+    return name
@@ -0,0 +1,318 @@
+"""Journal of uploads to Zenodo
+
+The journal of a conference records each step of the upload of a bundle:
+the creation of the deposition, the upload of each file and the upload of
+the metadata. Each step is appended as json line and synced to disk before
+the upload continues, so that an interrupted upload can be resumed with the
+existing drafts. Failed uploads are recorded as well (for information, the next
+run resumes them). The steps are recorded with the url of the Zenodo API, so
+that drafts in the sandbox aren't taken for drafts in the productive system
+(and vice versa).
+
+The MD5 checksums of uploaded files are cached (see ChecksumCache), so that
+files can be compared with the files in Zenodo's buckets without reading them
+again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+# name of json metadata file of bundles
+METADATA_FILE = "bundle_metadata.json"
+
+
+class UploadJournal:
+    """Append-only journal of the uploads of a conference
+
+    Attributes
+    ----------
+    journal_file : str
+        Path to journal file
+
+    url : str
+        Url of Zenodo API (depositions endpoint) the uploads are sent to
+
+    bundles : dict
+        Dictionary with bundle names as keys and upload states as values. An upload state
+        contains deposition id, bucket url and the uploaded files (with size and modification time, 
+        or MD5 checksum for metadata created in memory).
+    """
+
+    def __init__(self, journal_file: str, url: str) -> None:
+        """Constructor of UploadJournal class
+
+        Reads the steps of previous uploads to the given url from the journal file (if it exists).
+        Steps of uploads to other urls (e.g. to the sandbox before the upload to the productive 
+        system) are ignored.
+
+        Parameters
+        ----------
+        journal_file : str
+            Path to journal file
+        url : str
+            Url of Zenodo API (depositions endpoint) the uploads are sent to
+        """
+
+        self.journal_file = journal_file
+        self.url = url
+        self.bundles = {}
+        self.__lock = threading.Lock()
+        complete = True
+        if os.path.exists(journal_file):
+            complete = self.__load()
+        self.__file = open(journal_file, 'a', encoding='utf-8')
+        if not complete:
+            # start new line after line of interrupted write
+            self.__file.write("\n")
+
+    def __enter__(self) -> 'UploadJournal':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes journal file"""
+
+        self.__file.close()
+
+    def get_deposition(self, bundle: str) -> tuple:
+        """Returns bucket url and deposition id of bundle's draft
+
+        Parameters
+        ----------
+        bundle : str
+            Name of bundle
+
+        Returns
+        -------
+        bucket_url, deposition_id : tuple
+            Bucket url and deposition id (None, None if no deposition has been created for bundle)
+        """
+
+        state = self.bundles.get(bundle)
+        if state is None:
+            return None, None
+        return state["bucket_url"], state["deposition_id"]
+
+    def is_uploaded(self, bundle: str, path: str) -> bool:
+        """Returns True if file has been uploaded for bundle and hasn't changed since
+
+        Parameters
+        ----------
+        bundle : str
+            Name of bundle
+        path : str
+            Path to file (publication or json metadata) of bundle
+        """
+
+        state = self.bundles.get(bundle)
+        if state is None:
+            return False
+        return state["files"].get(os.path.basename(path)) == _get_file_entry(path)
+
+    def is_metadata_uploaded(self, bundle: str, data: dict) -> bool:
+        """Returns True if json metadata (created in memory) has been uploaded for bundle and hasn't changed since
+
+        Parameters
+        ----------
+        bundle : str
+            Name of bundle
+        data : dict
+            Json metadata of bundle
+        """
+
+        state = self.bundles.get(bundle)
+        if state is None:
+            return False
+        return state["files"].get(METADATA_FILE) == _get_metadata_entry(data)
+
+    def deposition_created(self, bundle: str, deposition_id, bucket_url: str) -> None:
+        """Records creation of deposition for bundle
+
+        Parameters
+        ----------
+        bundle : str
+            Name of bundle
+        deposition_id : int
+            Deposition id of created draft
+        bucket_url : str
+            Bucket url of created draft
+        """
+
+        self.__append({"event": "created", "bundle": bundle, "deposition_id": deposition_id, "bucket_url": bucket_url})
+
+    def file_uploaded(self, bundle: str, path: str) -> None:
+        """Records upload of file (publication or json metadata) of bundle
+
+        Parameters
+        ----------
+        bundle : str
+            Name of bundle
+        path : str
+            Path to uploaded file
+        """
+
+        self.__append({"event": "uploaded", "bundle": bundle, "file": os.path.basename(path), **_get_file_entry(path)})
+
+    def metadata_uploaded(self, bundle: str, data: dict) -> None:
+        """Records upload of json metadata (created in memory) of bundle
+
+        Parameters
+        ----------
+        bundle : str
+            Name of bundle
+        data : dict
+            Uploaded json metadata
+        """
+
+        self.__append({"event": "uploaded", "bundle": bundle, "file": METADATA_FILE, **_get_metadata_entry(data)})
+
+    def upload_failed(self, bundle: str, error: str) -> None:
+        """Records failed upload of bundle, the upload is resumed by the next run
+
+        Parameters
+        ----------
+        bundle : str
+            Name of bundle
+        error : str
+            Error message
+        """
+
+        self.__append({"event": "failed", "bundle": bundle, "error": error})
+
+    def deposition_deleted(self, deposition_id) -> None:
+        """Records deletion of draft, its bundle will be uploaded again with a new deposition
+
+        Parameters
+        ----------
+        deposition_id : int
+            Deposition id of deleted draft
+        """
+
+        for bundle, state in list(self.bundles.items()):
+            if str(state["deposition_id"]) == str(deposition_id):
+                self.__append({"event": "deleted", "bundle": bundle, "deposition_id": state["deposition_id"]})
+
+    # write step to journal file and apply it to upload states
+    def __append(self, step: dict) -> None:
+        step["url"] = self.url
+        with self.__lock:
+            self.__file.write(json.dumps(step) + "\n")
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__apply(step)
+
+    # read steps from journal file, return False if last line is incomplete
+    def __load(self) -> bool:
+        line = "\n"
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    step = json.loads(line)
+                except ValueError:
+                    # line of interrupted write
+                    logging.warning(f"Incomplete line in upload journal {self.journal_file} is ignored.")
+                    continue
+                self.__apply(step)
+        return line.endswith("\n")
+
+    # update upload state of bundle (steps of uploads to other urls are ignored)
+    def __apply(self, step: dict) -> None:
+        if step.get("url") != self.url:
+            return
+        bundle = step["bundle"]
+        if step["event"] == "created":
+            self.bundles[bundle] = {"deposition_id": step["deposition_id"], "bucket_url": step["bucket_url"], "files": {}}
+        elif step["event"] == "uploaded" and bundle in self.bundles:
+            self.bundles[bundle]["files"][step["file"]] = {key: value for key, value in step.items()
+                                                           if key not in ["event", "bundle", "file", "url"]}
+        elif step["event"] == "deleted":
+            self.bundles.pop(bundle, None)
+
+
+class ChecksumCache:
+    """Cache of MD5 checksums of files
+
+    The checksums are cached by path, size and modification time of the files
+    and saved in a json file, so that they are computed only once for unchanged files.
+
+    Attributes
+    ----------
+    cache_file : str
+        Path to cache file
+    """
+
+    def __init__(self, cache_file: str) -> None:
+        """Constructor of ChecksumCache class
+
+        Parameters
+        ----------
+        cache_file : str
+            Path to cache file
+        """
+
+        self.cache_file = cache_file
+        self.__lock = threading.Lock()
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self.__checksums = json.load(f)
+        except FileNotFoundError:
+            self.__checksums = {}
+        except ValueError:
+            logging.warning(f"Checksum cache {cache_file} can't be read. Checksums will be computed again.")
+            self.__checksums = {}
+
+    def __enter__(self) -> 'ChecksumCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.save()
+
+    def md5(self, path: str) -> str:
+        """Returns MD5 checksum (hex digest) of file
+
+        Parameters
+        ----------
+        path : str
+            Path to file
+        """
+
+        key = os.path.abspath(path)
+        entry = _get_file_entry(path)
+        with self.__lock:
+            cached = self.__checksums.get(key)
+        if cached and cached["size"] == entry["size"] and cached["mtime"] == entry["mtime"]:
+            return cached["md5"]
+        # stream file in chunks, large pdf files aren't read into memory at once
+        file_hash = hashlib.md5()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                file_hash.update(chunk)
+        entry.update({"md5": file_hash.hexdigest()})
+        with self.__lock:
+            self.__checksums[key] = entry
+        return entry["md5"]
+
+    def save(self) -> None:
+        """Saves cache file (replaced atomically)"""
+
+        tmp_file = self.cache_file + ".tmp"
+        with self.__lock:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.__checksums, f, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+
+
+# return size and modification time of file (single underscore, as it is used in class bodies)
+def _get_file_entry(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+# return md5 checksum of json metadata (single underscore, as it is used in class bodies)
+def _get_metadata_entry(data: dict) -> dict:
+    return {"md5": hashlib.md5(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()}
@@ -0,0 +1,224 @@
+"""Metrics of bundle creation and interaction with Zenodo API
+
+Collects the durations of the phases of a run (e.g. parsing the metadata file,
+assigning and copying the files) and counters and histograms of the requests
+sent to Zenodo (latency, status code, transferred bytes). At the end of a run
+the metrics are written as json summary and, optionally, in Prometheus text
+format (e.g. for the textfile collector of the node exporter).
+"""
+
+from contextlib import contextmanager
+import json
+import logging
+import os
+import threading
+import time
+
+# upper bounds of histogram buckets for durations in seconds
+SECONDS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+# upper bounds of histogram buckets for sizes in bytes
+BYTES_BUCKETS = [1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2, 1024 ** 3]
+
+
+class Metrics:
+    """Metrics of a run
+
+    All methods are thread-safe, so that worker threads can record their
+    metrics in the same instance. Durations of a phase recorded by several
+    threads are summed up, so they can exceed the wall time of the run.
+
+    Attributes
+    ----------
+    labels : dict
+        Labels of all metrics of the run (e.g. conference and kind of run)
+    phases : dict
+        Dictionary with phases as keys and their number of calls and durations as values
+    """
+
+    def __init__(self, labels: dict = None) -> None:
+        """Constructor of Metrics class
+
+        Parameters
+        ----------
+        labels : dict
+            Labels of all metrics of the run, e.g. {"run": "bundle", "conference": "DHd2024"} (Default: None)
+        """
+
+        self.labels = labels or {}
+        self.phases = {}
+        self.__counters = {}
+        self.__histograms = {}
+        self.__started = time.time()
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Records duration of the enclosed block as phase
+
+        Parameters
+        ----------
+        phase : str
+            Name of phase, e.g. 'parse' or 'copy'
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """Adds duration to phase
+
+        Parameters
+        ----------
+        phase : str
+            Name of phase
+        seconds : float
+            Duration in seconds
+        """
+
+        with self.__lock:
+            entry = self.phases.setdefault(phase, {"calls": 0, "seconds": 0.0, "max": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Increments counter
+
+        Parameters
+        ----------
+        name : str
+            Name of counter, e.g. 'api_requests_total'
+        value : float
+            Value added to counter (Default: 1)
+        labels
+            Labels of counter, e.g. method='PUT', status='200'
+        """
+
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: list = SECONDS_BUCKETS, **labels) -> None:
+        """Records value in histogram
+
+        Parameters
+        ----------
+        name : str
+            Name of histogram, e.g. 'api_request_seconds'
+        value : float
+            Observed value
+        buckets : list
+            Upper bounds of buckets, used when histogram is created (Default: SECONDS_BUCKETS)
+        labels
+            Labels of histogram, e.g. method='PUT'
+        """
+
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = {"buckets": list(buckets), "counts": [0] * (len(buckets) + 1), "count": 0, "sum": 0.0, "max": 0.0}
+                self.__histograms[key] = histogram
+            index = next((i for i, bound in enumerate(histogram["buckets"]) if value <= bound), len(histogram["buckets"]))
+            histogram["counts"][index] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+            histogram["max"] = max(histogram["max"], value)
+
+    def summary(self) -> dict:
+        """Returns summary of metrics
+
+        Returns
+        -------
+        summary : dict
+            Labels, wall time of the run and phases, counters and histograms (with cumulative bucket counts)
+        """
+
+        with self.__lock:
+            return {"labels": self.labels,
+                    "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.__started)),
+                    "seconds": round(time.time() - self.__started, 3),
+                    "phases": {phase: {"calls": entry["calls"], "seconds": round(entry["seconds"], 4), "max": round(entry["max"], 4)}
+                               for phase, entry in self.phases.items()},
+                    "counters": [{"name": name, "labels": dict(labels), "value": value}
+                                 for (name, labels), value in sorted(self.__counters.items())],
+                    "histograms": [{"name": name, "labels": dict(labels), "count": histogram["count"],
+                                    "sum": round(histogram["sum"], 4), "max": round(histogram["max"], 4),
+                                    "mean": round(histogram["sum"] / histogram["count"], 4),
+                                    "buckets": dict(zip([str(bound) for bound in histogram["buckets"]] + ["+Inf"],
+                                                        _cumulative(histogram["counts"])))}
+                                   for (name, labels), histogram in sorted(self.__histograms.items())]}
+
+    def to_prometheus(self) -> str:
+        """Returns metrics in Prometheus text format
+
+        The metrics are prefixed with 'zenodup_', the durations of the phases
+        are exported as counters zenodup_phase_seconds_total and zenodup_phase_calls_total.
+        """
+
+        summary = self.summary()
+        lines = ["# TYPE zenodup_phase_seconds_total counter", "# TYPE zenodup_phase_calls_total counter"]
+        for phase, entry in summary["phases"].items():
+            lines.append(f"zenodup_phase_seconds_total{self.__format_labels(phase=phase)} {entry['seconds']}")
+            lines.append(f"zenodup_phase_calls_total{self.__format_labels(phase=phase)} {entry['calls']}")
+        for name in sorted(set(counter["name"] for counter in summary["counters"])):
+            lines.append(f"# TYPE zenodup_{name} counter")
+            for counter in summary["counters"]:
+                if counter["name"] == name:
+                    lines.append(f"zenodup_{name}{self.__format_labels(**counter['labels'])} {counter['value']}")
+        for name in sorted(set(histogram["name"] for histogram in summary["histograms"])):
+            lines.append(f"# TYPE zenodup_{name} histogram")
+            for histogram in summary["histograms"]:
+                if histogram["name"] != name:
+                    continue
+                for bound, count in histogram["buckets"].items():
+                    lines.append(f"zenodup_{name}_bucket{self.__format_labels(**histogram['labels'], le=bound)} {count}")
+                lines.append(f"zenodup_{name}_sum{self.__format_labels(**histogram['labels'])} {histogram['sum']}")
+                lines.append(f"zenodup_{name}_count{self.__format_labels(**histogram['labels'])} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_file: str, prometheus: bool = False) -> None:
+        """Writes json summary of metrics (and metrics in Prometheus text format)
+
+        Parameters
+        ----------
+        metrics_file : str
+            Path to metrics file without extension, the summary is written to [metrics_file].json
+            and the Prometheus text format to [metrics_file].prom
+        prometheus : bool
+            Determines whether metrics are written in Prometheus text format as well (Default: False)
+        """
+
+        summary = self.summary()
+        with open(metrics_file + ".json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=1)
+        if prometheus:
+            # replaced atomically, as the file may be read by a collector at any time
+            with open(metrics_file + ".prom.tmp", 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(metrics_file + ".prom.tmp", metrics_file + ".prom")
+        phases = ", ".join(f"{phase} {entry['seconds']:.3f}s" for phase, entry in summary["phases"].items())
+        logging.info(f"Run took {summary['seconds']:.3f}s ({phases}). Metrics have been written to {metrics_file}.json.")
+
+    # format labels of run and given labels for Prometheus text format
+    def __format_labels(self, **labels) -> str:
+        labels = {**self.labels, **labels}
+        if not labels:
+            return ""
+        escaped = {label: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                   for label, value in labels.items()}
+        return "{" + ",".join(f'{label}="{value}"' for label, value in escaped.items()) + "}"
+
+
+# return cumulative counts of histogram buckets (single underscore, as it is used in class bodies)
+def _cumulative(counts: list) -> list:
+    total = 0
+    cumulative = []
+    for count in counts:
+        total += count
+        cumulative.append(total)
+    return cumulative
@@ -0,0 +1,28 @@
+"""Tests of requests to Zenodo API against local stand-in (see benchmarks.fake_zenodo)"""
+
+import time
+
+import pytest
+import requests
+
+import api
+from benchmarks.fake_zenodo import DEPOSITIONS
+
+
+@pytest.mark.parametrize("zenodo", [{"latency": 0.5}], indirect=True)
+def test_post_not_retried_after_read_timeout(zenodo):
+    session = api.ZenodoSession(timeout=(1, 0.2), retries=3, backoff_factor=0)
+    with pytest.raises(requests.exceptions.RequestException):
+        session.post(zenodo.url + DEPOSITIONS, json={})
+    # wait for server to finish the request
+    time.sleep(1)
+    assert len(zenodo.depositions) == 1
+
+
+@pytest.mark.parametrize("zenodo", [{"latency": 0.5}], indirect=True)
+def test_get_retried_after_read_timeout(zenodo):
+    session = api.ZenodoSession(timeout=(1, 0.2), retries=2, backoff_factor=0)
+    with pytest.raises(requests.exceptions.RequestException):
+        session.get(zenodo.url + DEPOSITIONS)
+    time.sleep(1)
+    assert zenodo.stats == {200: 3}
@@ -0,0 +1,41 @@
+"""Tests of bundle creation for small synthetic conference (see benchmarks.synthetic)"""
+
+import json
+import os
+
+import pytest
+
+import bundles
+
+
+def bundle_title(conference: bundles.Conference, name: str) -> str:
+    with open(os.path.join(conference.output, name, "bundle_metadata.json"), "r", encoding="utf-8") as f:
+        return json.load(f)["metadata"]["title"]
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_duplicate_bundle_name_keeps_bundle_of_name_scheme(conference, jobs):
+    # file of first abstract doesn't match name scheme, the file with its index is the file of the second abstract
+    pdf_dir = os.path.join(bundles.config["input_base"], conference, "pdf")
+    files = sorted(os.listdir(pdf_dir))
+    os.rename(os.path.join(pdf_dir, files[0]), os.path.join(pdf_dir, "zzz.pdf"))
+    con = bundles.Conference(conference, "metadata.xml", False, "pdf", None)
+    with pytest.raises(Exception, match="1 bundles could not be created"):
+        con.create_bundles(jobs=jobs)
+    name = os.path.splitext(files[1])[0]
+    assert bundle_title(con, name) == con.abstracts[1].raw_title
+    assert sorted(os.listdir(con.output)) == sorted(os.path.splitext(file)[0] for file in files[1:])
+    # assignments are written although a bundle has failed
+    with open(bundles.config["assignments_dir"] + conference + ".csv", "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 6
+
+
+def test_existing_directory_without_manifest_is_kept(conference):
+    con = bundles.Conference(conference, "metadata.xml", False, "pdf", "xml")
+    name = os.path.splitext(sorted(os.listdir(con.pdf))[0])[0]
+    os.mkdir(os.path.join(con.output, name))
+    with open(os.path.join(con.output, name, "notes.txt"), "w") as f:
+        f.write("not created by zenodup")
+    con.create_bundles()
+    assert os.listdir(os.path.join(con.output, name)) == ["notes.txt"]
+    assert len(os.listdir(con.output)) == 5
@@ -0,0 +1,48 @@
+"""Tests of response cache (expiry, eviction, cache files of previous version)"""
+
+import sqlite3
+import time
+
+from cache import ResponseCache
+
+URL = "https://zenodo.org/api/deposit/depositions/1"
+
+
+def test_response_expires_after_ttl(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.sqlite"), ttl=0.2) as response_cache:
+        response_cache.store(URL, {"id": 1}, etag='"1"')
+        assert response_cache.get(URL) == ({"id": 1}, {"If-None-Match": '"1"'})
+        time.sleep(0.3)
+        # used responses expire as well
+        assert response_cache.get(URL) == (None, {})
+
+
+def test_revalidated_response_is_fresh(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.sqlite"), ttl=0.3) as response_cache:
+        response_cache.store(URL, {"id": 1})
+        time.sleep(0.2)
+        response_cache.touch(URL)
+        time.sleep(0.2)
+        assert response_cache.get(URL)[0] == {"id": 1}
+
+
+def test_expired_responses_are_evicted(tmp_path):
+    cache_file = str(tmp_path / "cache.sqlite")
+    with ResponseCache(cache_file, ttl=0.1) as response_cache:
+        response_cache.store(URL, {"id": 1})
+        time.sleep(0.2)
+    with sqlite3.connect(cache_file) as db:
+        assert db.execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
+
+
+def test_cache_of_previous_version_is_expired(tmp_path):
+    cache_file = str(tmp_path / "cache.sqlite")
+    with sqlite3.connect(cache_file) as db:
+        db.execute("CREATE TABLE responses (url TEXT PRIMARY KEY, body BLOB, etag TEXT, "
+                   "last_modified TEXT, used REAL, size INTEGER)")
+        db.execute("INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)", (URL, b'{"id": 1}', None, None, time.time(), 9))
+    db.close()
+    with ResponseCache(cache_file) as response_cache:
+        assert response_cache.get(URL) == (None, {})
+        response_cache.store(URL, {"id": 2})
+        assert response_cache.get(URL)[0] == {"id": 2}
@@ -0,0 +1,137 @@
+"""Tests of upload journal against local stand-in for Zenodo (see benchmarks.fake_zenodo)"""
+
+import json
+import os
+
+import pytest
+
+import api
+import bundles
+import journal
+from benchmarks.fake_zenodo import FakeZenodo
+
+
+def create_bundles(name: str) -> None:
+    bundles.Conference(name, "metadata.xml", False, "pdf", "xml").create_bundles()
+
+
+def read_depositions(name: str) -> list:
+    with open(api.config['depositions_dir'] + 'depositions_' + name + ".txt", "r") as dep_file:
+        return [line.strip() for line in dep_file]
+
+
+def test_upload_to_other_host_ignores_journal(conference, zenodo):
+    create_bundles(conference)
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    with FakeZenodo() as productive:
+        # drafts of the first server aren't taken for drafts of the second server
+        api.Connection(conference, "token", False, base_url=productive.url).upload()
+        assert len(productive.depositions) == 5
+        assert all(deposition["metadata"] for deposition in productive.depositions.values())
+        assert all(len(bucket) == 2 for bucket in productive.buckets.values())
+        assert sorted(read_depositions(conference)) == sorted(productive.depositions)
+
+
+def test_failed_bundle_does_not_stop_upload(conference, zenodo):
+    create_bundles(conference)
+    output = os.path.join(api.config['output_base'], conference)
+    failing = sorted(os.listdir(output))[1]
+    bundle_json = os.path.join(output, failing, "bundle_metadata.json")
+    with open(bundle_json, "r") as f:
+        data = f.read()
+    # metadata without 'metadata' is rejected by Zenodo
+    with open(bundle_json, "w") as f:
+        f.write("{}")
+    with pytest.raises(Exception, match=f"1 bundles could not be uploaded: \\['{failing}'\\]"):
+        api.Connection(conference, "token", False, concurrency=2, base_url=zenodo.url).upload()
+    assert sum(1 for deposition in zenodo.depositions.values() if deposition["metadata"]) == 4
+    assert len(read_depositions(conference)) == 5
+
+    # next run resumes upload of failed bundle with its draft
+    with open(bundle_json, "w") as f:
+        f.write(data)
+    api.Connection(conference, "token", False, concurrency=2, base_url=zenodo.url).upload()
+    assert len(zenodo.depositions) == 5
+    assert all(deposition["metadata"] for deposition in zenodo.depositions.values())
+
+
+def read_journal(name: str) -> list:
+    with open(api.config['journals_dir'] + name + ".jsonl", "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_upload_of_uploaded_bundles_sends_no_requests(conference, zenodo):
+    create_bundles(conference)
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    requests = sum(zenodo.stats.values())
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    assert sum(zenodo.stats.values()) == requests
+    assert len(zenodo.depositions) == 5
+
+
+def test_interrupted_upload_is_resumed_with_drafts(conference, zenodo):
+    create_bundles(conference)
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    # journal of upload interrupted after creation of drafts (with incomplete last line)
+    created = [step for step in read_journal(conference) if step["event"] == "created"]
+    with open(api.config['journals_dir'] + conference + ".jsonl", "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(step) + "\n" for step in created)
+        f.write('{"event": "uploaded", "bun')
+    for deposition in zenodo.depositions.values():
+        deposition["metadata"] = {}
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    assert len(zenodo.depositions) == 5
+    assert all(deposition["metadata"] for deposition in zenodo.depositions.values())
+    assert sorted(read_depositions(conference)) == sorted(zenodo.depositions)
+
+
+def test_deleted_drafts_are_uploaded_again(conference, zenodo):
+    create_bundles(conference)
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    deleted = read_depositions(conference)
+    api.Connection(conference, "token", False, base_url=zenodo.url).delete()
+    assert zenodo.depositions == {}
+    assert all(step["event"] == "deleted" for step in read_journal(conference)[-5:])
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    assert len(zenodo.depositions) == 5
+    assert set(read_depositions(conference)).isdisjoint(deleted)
+
+
+def test_unchanged_files_in_bucket_are_not_uploaded(conference, zenodo):
+    create_bundles(conference)
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    # journal without uploaded files (e.g. of upload interrupted before they were recorded)
+    created = [step for step in read_journal(conference) if step["event"] == "created"]
+    with open(api.config['journals_dir'] + conference + ".jsonl", "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(step) + "\n" for step in created)
+    uploads = zenodo.stats[201]
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    assert zenodo.stats[201] == uploads
+
+    # changed file is uploaded again (compared by md5 checksum with file in bucket)
+    output = os.path.join(api.config['output_base'], conference)
+    bundle = sorted(os.listdir(output))[0]
+    pdf = os.path.join(output, bundle, "bundle_publications", bundle + ".pdf")
+    with open(pdf, "ab") as f:
+        f.write(b"% changed\n")
+    api.Connection(conference, "token", False, base_url=zenodo.url).upload()
+    assert zenodo.stats[201] == uploads + 1
+    with open(pdf, "rb") as f:
+        content = f.read()
+    assert any(entry.get("content") == content for bucket in zenodo.buckets.values() for entry in bucket.values())
+
+
+def test_checksums_are_computed_once_for_unchanged_files(tmp_path, monkeypatch):
+    path = tmp_path / "abstract.pdf"
+    path.write_bytes(b"%PDF-1.4\n%%EOF\n")
+    cache_file = str(tmp_path / "md5.json")
+    with journal.ChecksumCache(cache_file) as checksums:
+        checksum = checksums.md5(str(path))
+    opened = []
+    monkeypatch.setattr(journal, "open", lambda *args, **kwargs: opened.append(args[0]) or open(*args, **kwargs), raising=False)
+    with journal.ChecksumCache(cache_file) as checksums:
+        assert checksums.md5(str(path)) == checksum
+        assert str(path) not in opened
+        path.write_bytes(b"%PDF-1.4\n% changed\n%%EOF\n")
+        assert checksums.md5(str(path)) != checksum
+        assert str(path) in opened
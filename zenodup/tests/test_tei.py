@@ -0,0 +1,43 @@
+"""Tests of cached index of TEI files (see bundles.tei)"""
+
+import os
+
+import bundles
+from bundles import tei
+
+
+def test_index_reads_only_changed_files(conference, monkeypatch):
+    con = bundles.Conference(conference, "metadata.xml", False, "pdf", "xml")
+    con.create_bundles()
+    cache_file = os.path.join(bundles.config["manifests_dir"], conference + "_tei.json")
+    index = tei.TeiIndex(con.output, cache_file)
+    assert len(index.entries) == 5
+    assert all(entry["xml_id"] and entry["format"] for entry in index.entries.values())
+
+    read = []
+    read_header = tei.read_header
+    monkeypatch.setattr(tei, "read_header", lambda path: read.append(os.path.basename(path)) or read_header(path))
+    assert tei.TeiIndex(con.output, cache_file).entries == index.entries
+    assert read == []
+
+    # changed file is read again
+    file_name, entry = sorted(index.entries.items())[0]
+    with open(entry["path"], "r", encoding="utf-8") as f:
+        content = f.read()
+    with open(entry["path"], "w", encoding="utf-8") as f:
+        f.write(content.replace(f">{entry['format']}<", ">Changed subcategory<"))
+    changed = tei.TeiIndex(con.output, cache_file)
+    assert read == [file_name]
+    assert changed.get(file_name)["format"] == "Changed subcategory"
+
+    # removed file is removed from cached index
+    os.remove(entry["path"])
+    assert tei.TeiIndex(con.output, cache_file).get(file_name) is None
+    assert tei.TeiIndex(con.output, cache_file).entries.keys() == set(index.entries) - {file_name}
+
+
+def test_index_without_cache_file(conference):
+    con = bundles.Conference(conference, "metadata.xml", False, "pdf", "xml")
+    con.create_bundles()
+    index = tei.TeiIndex(con.output)
+    assert sorted(index.entries) == sorted(bundle + ".xml" for bundle in os.listdir(con.output))
@@ -0,0 +1,122 @@
+"""Tests of title matching (see bundles.titles)"""
+
+import csv
+import os
+import random
+import unicodedata
+from xml.etree import ElementTree as ET
+
+import pytest
+
+import api
+import bundles
+from benchmarks import synthetic
+from bundles import titles
+
+TITLES = ["Digitale Edition der Briefe", "Maschinelles Lernen im Theater", "Netzwerkanalyse von Zeitschriften-Korpora",
+          "\"Distant Reading\" und Überlieferung"]
+
+
+@pytest.mark.parametrize("variant", ["DIGITALE EDITION DER BRIEFE", "Digitale Edi-\ntion der Briefe",
+                                     "Digitale  Edition der Briefe.", "Digitale Edition der Briefe\\n"])
+def test_typographic_variants_match_exactly(variant):
+    assert titles.TitleIndex(TITLES).match(variant) == {"position": 0, "score": 1.0, "exact": True}
+
+
+def test_umlauts_and_quotes_are_folded():
+    assert titles.normalize("„Distant Reading“ und Ueberlieferung") == titles.normalize(TITLES[3])
+    assert titles.normalize("Überlieferung") == titles.normalize("Überlieferung")
+
+
+def test_fuzzy_match_respects_threshold():
+    title_index = titles.TitleIndex(TITLES)
+    title = "Maschinelles Lernen im Theater (Poster)"
+    score = titles.similarity(title, TITLES[1])
+    assert 0.7 < score < 1.0
+    assert title_index.match(title, min_score=0.7) == {"position": 1, "score": score, "exact": False}
+    assert title_index.match(title, min_score=score + 0.01)["position"] is None
+    assert title_index.match("Korpus der Straße", min_score=0.5)["position"] is None
+
+
+def test_index_finds_best_match_like_comparison_with_all_titles():
+    elements, _ = synthetic.metadata_elements(300)
+    abstract_titles = [elem.find("title").text for elem in elements]
+    title_index = titles.TitleIndex(abstract_titles)
+    rnd = random.Random(0)
+    for title in rnd.sample(abstract_titles, 30):
+        query = title.replace("Studie", "Studien").replace(":", "") + " " + rnd.choice(synthetic.WORDS)
+        scores = [titles.similarity(query, other) for other in abstract_titles]
+        best = max(scores)
+        match = title_index.match(query, min_score=0.6)
+        if best < 0.6:
+            assert match["position"] is None
+        else:
+            assert match["score"] == best and scores.index(best) == match["position"]
+
+
+@pytest.mark.parametrize("threshold, status", [(0.8, "fuzzy"), (0.99, "rejected")])
+def test_write_identifiers_for_posters(conference, zenodo, monkeypatch, threshold, status):
+    bundles.Conference(conference, "metadata.xml", False, "pdf", "xml").create_bundles()
+    con = api.Connection(conference, "token", False, base_url=zenodo.url)
+    con.upload()
+    con.publish()
+
+    # posters with title of abstract (typographic variant) and with addition to title
+    root = ET.parse(os.path.join(bundles.config["input_base"], conference, "metadata.xml")).getroot()
+    posters = root.findall("metadata")[:2]
+    posters[0].find("title").text = posters[0].find("title").text.upper()
+    posters[1].find("title").text += " (Poster)"
+    poster_root = ET.Element("root")
+    poster_root.extend(posters)
+    poster_dir = os.path.join(bundles.config["input_base"], conference + "_posters")
+    os.mkdir(poster_dir)
+    ET.ElementTree(poster_root).write(os.path.join(poster_dir, conference + "_posters.xml"), encoding="utf-8")
+
+    monkeypatch.setitem(api.config, "title_match_threshold", threshold)
+    api.Connection(conference, "token", False, base_url=zenodo.url).write_identifiers_for_posters()
+    with open(api.config["depositions_dir"] + "posters_" + conference + ".csv", "r", encoding="utf-8") as f:
+        report = list(csv.DictReader(f))
+    assert [row["status"] for row in report] == ["exact", status]
+    modified = ET.parse(os.path.join(poster_dir, conference + "_posters_related_ids.xml")).getroot()
+    relations = [elem.find("related_identifiers/related_identifier/relation").text for elem in modified.findall("metadata")]
+    assert relations == ["isSupplementTo", "isSupplementTo" if status == "fuzzy" else "isPartOf"]
+
+
+def test_optimal_assignment_maximizes_total_similarity():
+    # greedy assignment of best score first would get 0.9 + 0.1
+    assert titles.optimal_assignment([[0.9, 0.8], [0.85, 0.1]]) == [1, 0]
+
+
+def test_assign_titles():
+    other_titles = ["Netzwerkanalyse von Zeitschriften-Korpora (Poster)", "DIGITALE EDITION DER BRIEFE",
+                    "Maschinelles Lernen im Theater", "Annotation"]
+    assignment = titles.assign_titles(TITLES[:3], other_titles)
+    assert [column for column, _ in assignment] == [1, 2, 0]
+    assert [score for _, score in assignment][:2] == [1.0, 1.0]
+    assert 0.8 < assignment[2][1] < 1.0
+
+
+def read_assignments(name: str) -> list:
+    with open(bundles.config["assignments_dir"] + name + ".csv", "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize("threshold, statuses", [(0.8, ["reassigned", "reassigned", "verified"]),
+                                                 (0.0, ["verified", "verified", "verified"])])
+def test_assignments_below_threshold_are_matched_again(conference, monkeypatch, threshold, statuses):
+    # TEI files of first two abstracts are exchanged (e.g. swapped names in conference tool export)
+    xml_dir = os.path.join(bundles.config["input_base"], conference, "xml")
+    first, second = [os.path.join(xml_dir, xml) for xml in sorted(os.listdir(xml_dir))[:2]]
+    os.replace(first, first + ".tmp")
+    os.replace(second, first)
+    os.replace(first + ".tmp", second)
+
+    monkeypatch.setitem(bundles.config, "assignment_match_threshold", threshold)
+    con = bundles.Conference(conference, "metadata.xml", False, "pdf", "xml")
+    con.create_bundles()
+    rows = read_assignments(conference)
+    assert [row["Status"] for row in rows[:3]] == statuses
+    if threshold:
+        # abstracts are assigned to the files with their titles
+        assert [row["XML"] for row in rows[:2]] == [os.path.basename(second), os.path.basename(first)]
+        assert all(row["Title"] == row["Title from xml"] for row in rows)
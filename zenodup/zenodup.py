@@ -11,13 +11,19 @@ Please see README.md for more detailed documentation.
 import argparse
 
 import api
+import batch
 import bundles
 
 
 def __create_bundles(args):
     del args["func"]
+    jobs = args.pop("jobs")
+    link_mode = args.pop("link_mode")
     conference = bundles.Conference(**args)
-    conference.create_bundles()
+    try:
+        conference.create_bundles(jobs=jobs, link_mode=link_mode)
+    finally:
+        conference.write_metrics()
 
     # update metadata for conference (not part of regular workflow)
     # conference.update_metadata()
@@ -26,10 +32,62 @@ def __create_bundles(args):
 def __api_interact(args):
     del args["func"]
     action = args.pop("action")
+    # conference for upload from input directory
+    input_args = {"metadata": args.pop("from_input"), "sequenced": args.pop("sequenced"), "pdf": args.pop("pdf"), "xml": args.pop("xml")}
+    audit = args.pop("audit")
+    link_mode = args.pop("link_mode")
+    conference = None
+    if input_args["metadata"]:
+        if action != "upload":
+            raise Exception("Argument -from-input can only be used with action 'upload'.")
+        conference = bundles.Conference(args["name"], **input_args)
     con = api.Connection(**args)
-    func = {"upload": con.upload, "publish": con.publish, "update": con.update, "delete": con.delete,
+    func = {"upload": lambda: con.upload(conference, audit=audit, link_mode=link_mode), "publish": con.publish, "update": con.update, "delete": con.delete,
             "get_metadata": con.get_metadata, "write_identifiers_for_posters": con.write_identifiers_for_posters}
-    func[action]()
+    try:
+        with con.metrics.timer(action):
+            func[action]()
+    finally:
+        con.write_metrics()
+
+
+def __run_batch(args):
+    del args["func"]
+    actions = args.pop("actions")
+    base = bundles.config['input_base'] if args["bundle"] else bundles.config['output_base']
+    if not args["bundle"] and not actions:
+        raise Exception("Nothing to do for batch. Please pass -bundle and/or -actions.")
+    if actions and not args["token"]:
+        raise Exception("An access token (-token) is required for actions of Zenodo API.")
+    bundle_args = {"metadata": args["metadata"], "sequenced": args["sequenced"], "pdf": args["pdf"], "xml": args["xml"],
+                   "jobs": args["jobs"], "link_mode": args["link_mode"]}
+    api_args = {"token": args["token"], "productive": args["productive"], "concurrency": args["concurrency"],
+                "retry_failed": args["retry_failed"], "bulk": args["bulk"], "query": args["query"],
+                "offline": args["offline"], "base_url": args["base_url"]}
+    with batch.Batch(args["conferences"], base, jobs=args["jobs"], concurrency=args["concurrency"],
+                     api_actions=bool(actions), offline=args["offline"]) as conference_batch:
+        try:
+            results = conference_batch.run(bundle_args if args["bundle"] else None, actions, api_args, args["keep_going"])
+        finally:
+            # summary of processed conferences is printed to the console as output of the command (logging of the batch
+            # goes to the logging files of the conferences), also if the batch stopped at a failed conference
+            for name, duration in conference_batch.durations.items():
+                error = conference_batch.results.get(name)
+                print(f"{name}: {'failed (' + error + ')' if error else 'finished'} in {duration:.1f}s")
+    failed = [name for name, error in results.items() if error]
+    if failed:
+        raise Exception(f"{len(failed)} of {len(results)} conferences failed: {failed}. Please check logging files for more information.")
+
+
+# argument type of number of threads or concurrent requests
+def __positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a positive integer")
+    return number
 
 
 def __set_parser() -> argparse.ArgumentParser:
@@ -50,6 +108,8 @@ def __set_parser() -> argparse.ArgumentParser:
     bundle_parser.add_argument('-sequenced', nargs='?', type=bool, default=False, const=True)
     bundle_parser.add_argument('-pdf', nargs='?', type=str, default='pdf', const='pdf')
     bundle_parser.add_argument('-xml', nargs='?', type=str, default=None, const='xml')
+    bundle_parser.add_argument('-jobs', '--jobs', type=__positive_int, default=1)
+    bundle_parser.add_argument('-link-mode', '--link-mode', choices=bundles.LINK_MODES, default='copy')
     bundle_parser.set_defaults(func=__create_bundles)
     
     # ZENODO API PARSER
@@ -60,8 +120,45 @@ def __set_parser() -> argparse.ArgumentParser:
     api_parser.add_argument('name')
     api_parser.add_argument('token')
     api_parser.add_argument('-productive', nargs='?', type=bool, default=False, const=True)
+    api_parser.add_argument('-concurrency', '--concurrency', type=__positive_int, default=1)
+    api_parser.add_argument('-retry-failed', '--retry-failed', nargs='?', type=bool, default=False, const=True)
+    api_parser.add_argument('-bulk', '--bulk', nargs='?', type=bool, default=False, const=True)
+    api_parser.add_argument('-query', '--query', type=str, default=None)
+    api_parser.add_argument('-offline', '--offline', nargs='?', type=bool, default=False, const=True)
+    api_parser.add_argument('-base-url', '--base-url', type=str, default=None)
+    api_parser.add_argument('-from-input', '--from-input', type=str, default=None, metavar='METADATA')
+    api_parser.add_argument('-sequenced', nargs='?', type=bool, default=False, const=True)
+    api_parser.add_argument('-pdf', nargs='?', type=str, default='pdf', const='pdf')
+    api_parser.add_argument('-xml', nargs='?', type=str, default=None, const='xml')
+    api_parser.add_argument('-audit', '--audit', nargs='?', type=bool, default=False, const=True)
+    api_parser.add_argument('-link-mode', '--link-mode', choices=bundles.LINK_MODES, default='copy')
     api_parser.set_defaults(func=__api_interact)
 
+    # BATCH PARSER
+    batch_parser = subparsers.add_parser('batch', description='Create bundle structures and/or interact with zenodo api '
+                                                              'for many conferences in one process. Please see README.md '
+                                                              'for more detailed documentation.')
+    batch_parser.add_argument('conferences', nargs='+', help="Names of conferences or glob patterns, e.g. 'DHd20*'")
+    batch_parser.add_argument('-bundle', nargs='?', type=bool, default=False, const=True)
+    batch_parser.add_argument('-actions', nargs='+', default=[], choices=["upload", "publish", "update", "delete", "get_metadata",
+                                                                          "write_identifiers_for_posters"])
+    batch_parser.add_argument('-metadata', type=str, default='{name}_metadata.xml')
+    batch_parser.add_argument('-sequenced', nargs='?', type=bool, default=False, const=True)
+    batch_parser.add_argument('-pdf', nargs='?', type=str, default='pdf', const='pdf')
+    batch_parser.add_argument('-xml', nargs='?', type=str, default=None, const='xml')
+    batch_parser.add_argument('-jobs', '--jobs', type=__positive_int, default=1)
+    batch_parser.add_argument('-link-mode', '--link-mode', choices=bundles.LINK_MODES, default='copy')
+    batch_parser.add_argument('-token', '--token', type=str, default=None)
+    batch_parser.add_argument('-productive', nargs='?', type=bool, default=False, const=True)
+    batch_parser.add_argument('-concurrency', '--concurrency', type=__positive_int, default=1)
+    batch_parser.add_argument('-retry-failed', '--retry-failed', nargs='?', type=bool, default=False, const=True)
+    batch_parser.add_argument('-bulk', '--bulk', nargs='?', type=bool, default=False, const=True)
+    batch_parser.add_argument('-query', '--query', type=str, default=None)
+    batch_parser.add_argument('-offline', '--offline', nargs='?', type=bool, default=False, const=True)
+    batch_parser.add_argument('-base-url', '--base-url', type=str, default=None)
+    batch_parser.add_argument('-keep-going', '--keep-going', nargs='?', type=bool, default=False, const=True)
+    batch_parser.set_defaults(func=__run_batch)
+
     return zenodup_parser
 
 if __name__ == "__main__":